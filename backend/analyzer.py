@@ -1,4 +1,218 @@
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+
+# The literal prefilter reads CPython's private regex parser (sre_parse before 3.11).
+# Without it every pattern is simply scanned unfiltered.
+try:
+    from re import _constants, _parser
+except ImportError:
+    _constants = _parser = None
+
+# Optional native multi-pattern engines; without either, the prefiltered re groups are used
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+try:
+    import re2
+except ImportError:
+    re2 = None
+# Other PyPI packages (re2, pyre2) install the same module name without RE2::Set
+if re2 is not None and not hasattr(re2, "Set"):
+    re2 = None
+
+# Detection results keyed by (method, content digest); repo scans revisit the same files
+_RESULT_CACHE_SIZE = 4096
+_result_cache: OrderedDict = OrderedDict()
+
+
+def _cached(kind: str, code: str, compute):
+    """Return compute(code), memoized by a digest of code in a bounded LRU."""
+    key = (kind, hashlib.blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+    try:
+        _result_cache.move_to_end(key)
+        return _result_cache[key]
+    except KeyError:
+        pass
+    result = compute(code)
+    _result_cache[key] = result
+    if len(_result_cache) > _RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+    return result
+
+
+def _compile_alternation(patterns) -> re.Pattern:
+    """Fuse a pattern list into one alternation so code is scanned once per category."""
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+# Literals that appear in nearly every source file and make poor prefilter anchors
+_COMMON_LITERALS = frozenset({"import", "from", "require", "use", "new", "#include"})
+
+
+def _required_literals(pattern: str) -> frozenset[str] | None:
+    """Return literals of which at least one must appear in any text the pattern matches.
+
+    Walks the parsed regex: a run of consecutive literal characters is required,
+    and a top-level alternation requires one literal from each branch. Returns
+    None when no such literal exists (the pattern can't be prefiltered), or when
+    the private parser is missing or its output isn't in the expected shape.
+    """
+    if _parser is None:
+        return None
+    try:
+        parsed = _parser.parse(pattern)
+        if parsed.state.flags & re.IGNORECASE:
+            return None
+        return _sequence_literals(parsed)
+    except Exception:
+        return None
+
+
+def _sequence_literals(items) -> frozenset[str] | None:
+    candidates = []
+    run = ""
+    for op, av in items:
+        if op is _constants.LITERAL:
+            run += chr(av)
+            continue
+        if run:
+            candidates.append(frozenset([run]))
+            run = ""
+        if op is _constants.BRANCH:
+            branches = [_sequence_literals(branch) for branch in av[1]]
+            if all(branches):
+                candidates.append(frozenset().union(*branches))
+        elif op is _constants.SUBPATTERN and not av[1] & re.IGNORECASE:
+            inner = _sequence_literals(av[3])
+            if inner:
+                candidates.append(inner)
+    if run:
+        candidates.append(frozenset([run]))
+    if not candidates:
+        return None
+    # Prefer distinctive candidates, then the one whose shortest literal is longest
+    return max(candidates, key=lambda literals: (
+        not (literals & _COMMON_LITERALS),
+        min(len(lit) for lit in literals),
+    ))
+
+
+def _minimal_anchors(literals) -> tuple[str, ...]:
+    """Drop literals that contain another literal (finding the shorter one is implied)."""
+    literals = set(literals)
+    return tuple(sorted(
+        a for a in literals
+        if not any(b != a and b in a for b in literals)
+    ))
+
+
+class _PatternGroup:
+    """A category of patterns: a literal prefilter in front of one fused regex.
+
+    Substring checks run at memchr speed, so the regex only scans files that
+    contain at least one literal some pattern in the group requires.
+    """
+
+    __slots__ = ("patterns", "anchors", "regex")
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        self.regex = _compile_alternation(patterns)
+        literals = [_required_literals(p) for p in patterns]
+        if all(literals):
+            self.anchors = _minimal_anchors(set().union(*literals))
+        else:
+            self.anchors = None
+
+    def matches(self, code: str) -> bool:
+        anchors = self.anchors
+        if anchors is not None:
+            # Plain loop: avoids a generator frame per call on the hot path
+            for anchor in anchors:
+                if anchor in code:
+                    break
+            else:
+                return False
+        return self.regex.search(code) is not None
+
+
+class _HyperscanMatcher:
+    """Every pattern group compiled into one Hyperscan database.
+
+    A single scan of the code reports all matching groups at once, instead of
+    one regex pass per group. Matching is byte-oriented, so \\s and \\w only
+    cover ASCII; the patterns don't depend on anything wider.
+    """
+
+    def __init__(self, groups):
+        expressions, ids = [], []
+        for index, group in enumerate(groups):
+            for pattern in group.patterns:
+                expressions.append(pattern.encode())
+                ids.append(index)
+        self.groups = tuple(groups)
+        self.db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        self.db.compile(
+            expressions=expressions,
+            ids=ids,
+            elements=len(expressions),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions),
+        )
+        # Scratch space can't be shared between concurrent scans
+        self._local = threading.local()
+
+    def scan(self, code: str) -> frozenset:
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self.db)
+        matched = set()
+
+        def on_match(index, start, end, flags, context):
+            matched.add(self.groups[index])
+
+        self.db.scan(code.encode("utf-8", "surrogatepass"), match_event_handler=on_match, scratch=scratch)
+        return frozenset(matched)
+
+
+class _Re2SetMatcher:
+    """Every pattern group compiled into one RE2::Set (google-re2).
+
+    Same single-pass contract as _HyperscanMatcher, for platforms Hyperscan
+    doesn't support (e.g. ARM). RE2's \\s and \\b are ASCII-only as well.
+    """
+
+    def __init__(self, groups):
+        self.pattern_groups = []
+        self.set = re2.Set.SearchSet()
+        for group in groups:
+            for pattern in group.patterns:
+                self.set.Add(pattern)
+                self.pattern_groups.append(group)
+        self.set.Compile()
+
+    def scan(self, code: str) -> frozenset:
+        return frozenset(self.pattern_groups[index] for index in self.set.Match(code) or ())
+
+
+def _build_native_matcher(groups):
+    if hyperscan is not None:
+        return _HyperscanMatcher(groups)
+    if re2 is not None:
+        return _Re2SetMatcher(groups)
+    return None
+
+
+# Client-identification patterns used by detect_framework
+_OPENAI = _PatternGroup([r"from\s+openai\s+import|import\s+openai|OpenAI\s*\("])
+_ANTHROPIC = _PatternGroup([r"from\s+anthropic\s+import|import\s+anthropic|Anthropic\s*\("])
+_GEMINI = _PatternGroup([r"import\s+google\.generativeai|from\s+google\s+import\s+genai|genai\.Client|GoogleGenerativeAI"])
+_OLLAMA = _PatternGroup([r"from\s+ollama\s+import|import\s+ollama"])
+_LLAMA_CPP = _PatternGroup([r"from\s+llama_cpp\s+import|import\s+llama_cpp|from\s+gguf\s+import|from\s+ctransformers\s+import"])
+_MCP = _PatternGroup([r"@modelcontextprotocol/sdk|from\s+mcp\.server|from\s+mcp\s+import|from\s+fastmcp\s+import|McpServer\s*\(|MCPServer\s*\(|FastMCP\s*\(|mcp-go|modelcontextprotocol/go-sdk|use\s+rmcp\b|mcp::server|mcp_server\.h"])
+
 
 class StaticAnalyzer:
     # LLM Client Detection Patterns
@@ -226,50 +440,101 @@ class StaticAnalyzer:
         ]
     }
 
+    # Compiled once at class load: one prefiltered alternation per category (frameworks keep their order)
+    LLM_CLIENTS = _PatternGroup(LLM_CLIENT_PATTERNS)
+    LLM_CALLS = _PatternGroup(LLM_CALL_PATTERNS)
+    FRAMEWORKS = {
+        framework: _PatternGroup(patterns)
+        for framework, patterns in FRAMEWORK_PATTERNS.items()
+    }
+    # Any workflow/framework match needs at least one of these; most files contain none
+    _ALL_GROUPS = (
+        LLM_CLIENTS, LLM_CALLS, *FRAMEWORKS.values(),
+        _OPENAI, _ANTHROPIC, _GEMINI, _OLLAMA, _LLAMA_CPP, _MCP,
+    )
+    ANCHORS = (
+        _minimal_anchors(anchor for group in _ALL_GROUPS for anchor in group.anchors)
+        if all(group.anchors is not None for group in _ALL_GROUPS)
+        else None
+    )
+    _NATIVE_MATCHER = _build_native_matcher(_ALL_GROUPS)
+
+    @staticmethod
+    def has_anchor(code: str) -> bool:
+        """Cheap substring prefilter: False means no pattern can match."""
+        anchors = StaticAnalyzer.ANCHORS
+        if anchors is None:
+            return True
+        for anchor in anchors:
+            if anchor in code:
+                return True
+        return False
+
+    @staticmethod
+    def _group_test(code: str):
+        """Return a predicate telling whether a pattern group matches code."""
+        if StaticAnalyzer._NATIVE_MATCHER is not None:
+            return StaticAnalyzer._NATIVE_MATCHER.scan(code).__contains__
+        return lambda group: group.matches(code)
+
     @staticmethod
     def detect_workflow(code: str) -> bool:
         """Detect if code contains LLM workflow patterns"""
+        return _cached("workflow", code, StaticAnalyzer._detect_workflow)
 
-        # Check for LLM client imports
-        has_llm_client = any(re.search(pattern, code) for pattern in StaticAnalyzer.LLM_CLIENT_PATTERNS)
-
-        # Check for actual LLM API calls
-        has_llm_calls = any(re.search(pattern, code) for pattern in StaticAnalyzer.LLM_CALL_PATTERNS)
+    @staticmethod
+    def detect_framework(code: str, file_path: str) -> str | None:
+        """Detect workflow framework from actual imports"""
+        return _cached("framework", code, StaticAnalyzer._detect_framework)
 
-        # Check for framework usage
-        has_framework = any(
-            any(re.search(pattern, code) for pattern in patterns)
-            for patterns in StaticAnalyzer.FRAMEWORK_PATTERNS.values()
-        )
+    @staticmethod
+    def _detect_workflow(code: str) -> bool:
+        # A native engine scans everything in one pass faster than the anchor check alone
+        if StaticAnalyzer._NATIVE_MATCHER is None and not StaticAnalyzer.has_anchor(code):
+            return False
+        return StaticAnalyzer._workflow_from(StaticAnalyzer._group_test(code))
 
-        # File is a workflow if it has LLM clients + calls, or uses a framework
-        return (has_llm_client and has_llm_calls) or has_framework
+    @staticmethod
+    def _workflow_from(matches) -> bool:
+        # File is a workflow if it has LLM clients + calls, or uses a framework.
+        # Evaluated lazily: calls are only scanned when a client was found, and
+        # frameworks only when the client + calls check didn't already succeed.
+        clients, calls, frameworks = StaticAnalyzer.LLM_CLIENTS, StaticAnalyzer.LLM_CALLS, StaticAnalyzer.FRAMEWORKS
+        if matches(clients) and matches(calls):
+            return True
+        for group in frameworks.values():
+            if matches(group):
+                return True
+        return False
 
     @staticmethod
-    def detect_framework(code: str, file_path: str) -> str | None:
-        """Detect workflow framework from actual imports"""
+    def _detect_framework(code: str) -> str | None:
+        # A native engine scans everything in one pass faster than the anchor check alone
+        if StaticAnalyzer._NATIVE_MATCHER is None and not StaticAnalyzer.has_anchor(code):
+            return None
+        matches = StaticAnalyzer._group_test(code)
 
         # Check for specific frameworks first
-        for framework, patterns in StaticAnalyzer.FRAMEWORK_PATTERNS.items():
-            if any(re.search(pattern, code) for pattern in patterns):
+        for framework, group in StaticAnalyzer.FRAMEWORKS.items():
+            if matches(group):
                 return framework
 
         # Detect generic LLM usage and identify the client
-        if re.search(r"from\s+openai\s+import|import\s+openai|OpenAI\s*\(", code):
+        if matches(_OPENAI):
             return "openai"
-        if re.search(r"from\s+anthropic\s+import|import\s+anthropic|Anthropic\s*\(", code):
+        if matches(_ANTHROPIC):
             return "anthropic"
-        if re.search(r"import\s+google\.generativeai|from\s+google\s+import\s+genai|genai\.Client|GoogleGenerativeAI", code):
+        if matches(_GEMINI):
             return "gemini"
-        if re.search(r"from\s+ollama\s+import|import\s+ollama", code):
+        if matches(_OLLAMA):
             return "ollama"
-        if re.search(r"from\s+llama_cpp\s+import|import\s+llama_cpp|from\s+gguf\s+import|from\s+ctransformers\s+import", code):
+        if matches(_LLAMA_CPP):
             return "llama-cpp"
-        if re.search(r"@modelcontextprotocol/sdk|from\s+mcp\.server|from\s+mcp\s+import|from\s+fastmcp\s+import|McpServer\s*\(|MCPServer\s*\(|FastMCP\s*\(|mcp-go|modelcontextprotocol/go-sdk|use\s+rmcp\b|mcp::server|mcp_server\.h", code):
+        if matches(_MCP):
             return "mcp"
 
         # Check if it has any LLM patterns
-        if StaticAnalyzer.detect_workflow(code):
+        if StaticAnalyzer._workflow_from(matches):
             return "generic-llm"
 
         return None
@@ -1,5 +1,9 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings
 
+ENV_FILE = ".env"
+
 class Settings(BaseSettings):
     gemini_api_key: str = ""
     litellm_base_url: str = ""
@@ -7,9 +11,18 @@ class Settings(BaseSettings):
     litellm_model: str = ""
     litellm_ssl_verify: bool = False
     litellm_ca_bundle: str = ""
+    litellm_gzip_requests: bool = False
+    llm_cache_dir: str = ""
+    llm_hedge_after: float = 0.0
+    analyze_concurrency: int = 16
 
     class Config:
-        env_file = ".env"
+        env_file = ENV_FILE
         extra = "ignore"
+        frozen = True
+
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse .env and the environment once; call get_settings.cache_clear() to re-read."""
+    return Settings()
@@ -1,20 +1,243 @@
 import asyncio
+import gzip
+import json
+import random
 import re
 import os
+import signal
+import threading
+import time
 import httpx
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
 
 from google import genai
 from google.genai import types
-from openai import AsyncOpenAI
 
-from config import settings
+from config import ENV_FILE, Settings, get_settings
 from prompts import SYSTEM_INSTRUCTION, build_user_prompt, CONDENSATION_SYSTEM_PROMPT
 from models import TokenUsage, CostData
+from llm_cache import DiskCache, LLMCache
+
+try:
+    import orjson
+except ImportError:  # optional C decoder; stdlib json is the fallback
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional typed decoder for chat completion bodies
+    msgspec = None
 
 # Gemini 2.5 Flash pricing (per 1M tokens)
 INPUT_PRICE_PER_1M = 0.075
 OUTPUT_PRICE_PER_1M = 0.30
 
+# Gemini request configs are constant, so build them once instead of per call.
+# system_instruction is passed as a parameter (not concatenated into content).
+ANALYZE_CONFIG = types.GenerateContentConfig(
+    system_instruction=SYSTEM_INSTRUCTION,
+    temperature=0.0,
+    top_p=1.0,
+    top_k=1,
+    max_output_tokens=65536,
+)
+CONDENSE_CONFIG = types.GenerateContentConfig(
+    system_instruction=CONDENSATION_SYSTEM_PROMPT,
+    temperature=0.0,
+    top_p=1.0,
+    top_k=1,
+    max_output_tokens=8192,
+)
+# Metadata is JSON; asking for it natively avoids fenced or prose-wrapped output
+METADATA_CONFIG = types.GenerateContentConfig(
+    temperature=0.0,
+    top_p=1.0,
+    top_k=1,
+    max_output_tokens=8192,
+    response_mime_type="application/json",
+)
+
+
+# Rate-limit detection for retries. Analysis also retries on generic "rate" errors
+# and honors the server's "retry in N" hint; condense/metadata only retry 429/quota.
+_RETRY_IN_RE = re.compile(r'retry in ([\d.]+)', re.IGNORECASE)
+_RATE_LIMIT_RE = re.compile(r'429|quota|rate', re.IGNORECASE)
+_QUOTA_RE = re.compile(r'429|quota', re.IGNORECASE)
+
+# Endpoint paths users sometimes paste into LITELLM_BASE_URL; only the last one is stripped
+_OPENAI_ENDPOINT_SUFFIX_RE = re.compile(r"/(?:chat/completions|models)\Z")
+
+# Decorrelated-jitter backoff bounds, in seconds
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 30.0
+
+# Upstream statuses retried whatever the error text says
+_TRANSIENT_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Seconds /health waits on the free models.list probe before also sending a billed 1-token completion
+_HEALTH_COMPLETION_HEDGE = 2.0
+
+T = TypeVar("T")
+
+
+def _error_status(error: Exception) -> int | None:
+    """HTTP status carried by an httpx, OpenAI or google-genai error, if any."""
+    response = getattr(error, "response", None)
+    for status in (getattr(error, "status_code", None), getattr(error, "code", None), getattr(response, "status_code", None)):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+async def _maybe_backoff(
+    error: Exception,
+    attempt: int,
+    max_retries: int,
+    retryable: re.Pattern = _RATE_LIMIT_RE,
+    use_retry_hint: bool = True,
+    prev_wait: float = _BACKOFF_BASE,
+) -> float:
+    """Sleep before the next attempt if error is transient, otherwise re-raise it.
+
+    Transient means a rate limit / timeout / 5xx status, or (for errors with
+    no status) text matching retryable; any other 4xx fails immediately.
+    Uses decorrelated jitter so concurrent workers don't retry in lockstep; a
+    server-provided "retry in N" hint still wins, plus up to 25% jitter.
+    Returns the time slept.
+    """
+    error_str = str(error)
+    status = _error_status(error)
+    transient = status in _TRANSIENT_STATUSES if status is not None else bool(retryable.search(error_str))
+    if not transient or attempt >= max_retries - 1:
+        raise error
+    wait_time = min(_BACKOFF_CAP, random.uniform(_BACKOFF_BASE, max(_BACKOFF_BASE, prev_wait) * 3))
+    if use_retry_hint:
+        match = _RETRY_IN_RE.search(error_str)
+        if match:
+            # Clients throttled together get the same hint; spread them out a little
+            wait_time = float(match.group(1)) / 1000 + 1
+            wait_time += random.uniform(0, 0.25 * wait_time)
+    await asyncio.sleep(wait_time)
+    return wait_time
+
+
+async def _call_with_retries(
+    request: Callable[[], Awaitable[T]],
+    retryable: re.Pattern = _RATE_LIMIT_RE,
+    use_retry_hint: bool = True,
+    max_retries: int = 3,
+) -> T:
+    """Await request(), retrying retryable errors with backoff."""
+    wait_time = _BACKOFF_BASE
+    for attempt in range(max_retries):
+        try:
+            return await request()
+        except Exception as e:
+            wait_time = await _maybe_backoff(e, attempt, max_retries, retryable, use_retry_hint, wait_time)
+
+
+async def _stream_with_retries(
+    open_stream: Callable[[], AsyncIterator[str]],
+    retryable: re.Pattern = _RATE_LIMIT_RE,
+    use_retry_hint: bool = True,
+    max_retries: int = 3,
+    hedge_after: float = 0.0,
+    on_hedge: Callable[[int, bool], None] | None = None,
+) -> AsyncIterator[str]:
+    """Yield from open_stream(), retrying only until the first chunk arrives.
+
+    Rate limits surface before any text; once output has started it can't be retried.
+    With hedge_after > 0 each attempt is a _hedged_stream reporting to on_hedge.
+    """
+    wait_time = _BACKOFF_BASE
+    for attempt in range(max_retries):
+        yielded = False
+        try:
+            # aclosing: an abandoned stream must close the upstream connection now, not at GC
+            chunks = _hedged_stream(open_stream, hedge_after, on_hedge) if hedge_after > 0 else open_stream()
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    yielded = True
+                    yield chunk
+            return
+        except Exception as e:
+            if yielded:
+                raise
+            wait_time = await _maybe_backoff(e, attempt, max_retries, retryable, use_retry_hint, wait_time)
+
+
+async def _hedged_stream(
+    open_stream: Callable[[], AsyncIterator[str]],
+    hedge_after: float,
+    on_hedge: Callable[[int, bool], None] | None = None,
+) -> AsyncIterator[str]:
+    """Yield from open_stream(), hedging a stalled start with a second identical stream.
+
+    If no first chunk arrives within hedge_after seconds, a second stream is
+    opened and whichever produces a chunk first is kept; the other is
+    cancelled and closed. Only time-to-first-chunk is hedged, so slow but
+    progressing generations never pay for a duplicate request.
+    Once a hedged start is decided, on_hedge(abandoned, hedge_won) gets the
+    number of streams cancelled mid-request and whether the second stream won.
+    """
+    streams = [open_stream()]
+    pending = {asyncio.ensure_future(anext(streams[0])): streams[0]}
+    winner = None
+    first_chunk = None
+    exhausted = False
+    try:
+        while winner is None:
+            timeout = hedge_after if len(streams) == 1 else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                streams.append(open_stream())
+                pending[asyncio.ensure_future(anext(streams[-1]))] = streams[-1]
+                continue
+            for task in done:
+                stream = pending.pop(task)
+                error = task.exception()
+                if error is None or isinstance(error, StopAsyncIteration):
+                    winner = stream
+                    exhausted = error is not None
+                    first_chunk = None if exhausted else task.result()
+                    break
+                if not pending:
+                    raise error
+        if on_hedge is not None and len(streams) > 1:
+            on_hedge(len(pending), winner is not streams[0])
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for stream in streams:
+            if stream is not winner:
+                await stream.aclose()
+
+    async with aclosing(winner):
+        if exhausted:
+            return
+        yield first_chunk
+        async for chunk in winner:
+            yield chunk
+
+
+def parse_llm_json(text: str | bytes):
+    """Decode JSON from an LLM response, using orjson when it is installed.
+
+    Raises json.JSONDecodeError on invalid input either way (orjson's error subclasses it).
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def dump_llm_json(payload) -> bytes:
+    """Encode a request body as compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
 
 def extract_usage(response) -> TokenUsage:
     """Extract token usage from Gemini API response."""
@@ -42,7 +265,7 @@ def extract_openai_usage(response) -> TokenUsage:
     """Extract token usage from OpenAI-compatible responses."""
     usage = getattr(response, "usage", None)
     if not usage:
-        return TokenUsage(input_tokens=0, output_tokens=0, total_tokens=0, cached_tokens=0)
+        return zero_usage()
 
     prompt_tokens_details = getattr(usage, "prompt_tokens_details", None)
     cached_tokens = 0
@@ -57,31 +280,203 @@ def extract_openai_usage(response) -> TokenUsage:
     )
 
 
+def litellm_usage(usage_data: dict) -> TokenUsage:
+    """Token usage from an OpenAI-compatible JSON `usage` object."""
+    prompt_tokens_details = usage_data.get("prompt_tokens_details") or {}
+    return TokenUsage(
+        input_tokens=usage_data.get("prompt_tokens") or 0,
+        output_tokens=usage_data.get("completion_tokens") or 0,
+        total_tokens=usage_data.get("total_tokens") or 0,
+        cached_tokens=prompt_tokens_details.get("cached_tokens") or 0,
+    )
+
+
+if msgspec is not None:
+    # Only the fields we read; everything else in the body is skipped by the decoder.
+    # Counts are nullable because some OpenAI-compatible backends send null.
+    class _PromptTokensDetails(msgspec.Struct):
+        cached_tokens: int | None = None
+
+    class _ChatUsage(msgspec.Struct):
+        prompt_tokens: int | None = None
+        completion_tokens: int | None = None
+        total_tokens: int | None = None
+        prompt_tokens_details: _PromptTokensDetails | None = None
+
+    class _ChatMessage(msgspec.Struct):
+        content: str | None = None
+
+    class _ChatChoice(msgspec.Struct):
+        message: _ChatMessage | None = None
+
+    class _ChatCompletion(msgspec.Struct):
+        choices: list[_ChatChoice] = []
+        usage: _ChatUsage | None = None
+
+    _chat_completion_decoder = msgspec.json.Decoder(_ChatCompletion)
+
+
+def decode_chat_completion(body: bytes) -> tuple[str, TokenUsage]:
+    """Message content and token usage from a non-streaming chat completion body.
+
+    With msgspec installed the body decodes straight into typed structs; a body
+    that doesn't fit that schema (or isn't JSON) takes the generic dict path.
+    """
+    if msgspec is not None:
+        try:
+            completion = _chat_completion_decoder.decode(body)
+        except msgspec.DecodeError:
+            pass
+        else:
+            if not completion.choices:
+                raise Exception("LiteLLM returned empty choices.")
+            message = completion.choices[0].message
+            if message is None or message.content is None:
+                raise Exception("LiteLLM returned empty response content.")
+            usage = completion.usage
+            if usage is None:
+                return message.content, zero_usage()
+            details = usage.prompt_tokens_details
+            # Counts are already ints, so skip pydantic validation
+            return message.content, TokenUsage.model_construct(
+                input_tokens=usage.prompt_tokens or 0,
+                output_tokens=usage.completion_tokens or 0,
+                total_tokens=usage.total_tokens or 0,
+                cached_tokens=(details.cached_tokens if details else None) or 0,
+            )
+
+    data = parse_llm_json(body)
+    try:
+        choice = data["choices"][0]
+    except (KeyError, IndexError, TypeError):
+        raise Exception("LiteLLM returned empty choices.") from None
+    try:
+        content = choice["message"]["content"]
+    except (KeyError, TypeError):
+        content = None
+    if content is None:
+        raise Exception("LiteLLM returned empty response content.")
+
+    return content, litellm_usage(data.get("usage") or {})
+
+
+def with_abandoned_prompts(usage: TokenUsage, abandoned: int) -> TokenUsage:
+    """Add the prompt tokens of abandoned duplicate requests to usage.
+
+    A hedged duplicate sends the same prompt, so it was billed the same input
+    tokens. It is cancelled before its first streamed chunk is used, so there
+    are no completion tokens of its own to count.
+    """
+    if not abandoned:
+        return usage
+    extra = usage.input_tokens * abandoned
+    return TokenUsage(
+        input_tokens=usage.input_tokens + extra,
+        output_tokens=usage.output_tokens,
+        total_tokens=usage.total_tokens + extra,
+        cached_tokens=usage.cached_tokens,
+    )
+
+
+def zero_usage() -> TokenUsage:
+    return TokenUsage(input_tokens=0, output_tokens=0, total_tokens=0, cached_tokens=0)
+
+
 def zero_cost() -> CostData:
     return CostData(input_cost=0.0, output_cost=0.0, total_cost=0.0)
 
 
+class LLMStream:
+    """A streamed LLM response.
+
+    Iterate to receive text deltas as they arrive; usage and cost are final
+    once iteration completes.
+    """
+
+    def __init__(self, produce: Callable[["LLMStream"], AsyncIterator[str]]):
+        self.usage = zero_usage()
+        self.cost = zero_cost()
+        # Duplicate requests cancelled by hedging; the provider still bills their prompts
+        self.abandoned_requests = 0
+        self._chunks = produce(self)
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._chunks
+
+    async def collect(self) -> tuple[str, TokenUsage, CostData]:
+        """Drain the stream and return (text, usage, cost)."""
+        text = "".join([chunk async for chunk in self])
+        return text, self.usage, self.cost
+
+
+# Pooled clients for LiteLLM calls, shared by every LLMClient so requests reuse
+# keep-alive connections. Keyed by TLS verify option; a pool superseded by a
+# TLS config change stays until shutdown since another client may still use it.
+_SHARED_HTTP: dict[bool | str, httpx.AsyncClient] = {}
+
+
+def get_http(verify: bool | str) -> httpx.AsyncClient:
+    """Return the shared LiteLLM connection pool for this TLS verify option.
+
+    Gemini keeps the SDK's own pool: LiteLLM's TLS settings (verification is
+    off by default) must not apply to Gemini traffic.
+    """
+    client = _SHARED_HTTP.get(verify)
+    if client is None or client.is_closed:
+        # httpx already sends Accept-Encoding: gzip, deflate (plus br/zstd when
+        # brotli/zstandard are installed) and decodes responses transparently.
+        client = _SHARED_HTTP[verify] = httpx.AsyncClient(
+            # Fail fast on unreachable proxies; long timeouts are only for generation
+            timeout=httpx.Timeout(120.0, connect=20.0),
+            verify=verify,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+    return client
+
+
+async def close_shared_http() -> None:
+    """Close every shared LiteLLM pool; get_http() reopens one on next use."""
+    clients = list(_SHARED_HTTP.values())
+    _SHARED_HTTP.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def _gemini_aclose(client: genai.Client | None) -> Callable[[], Awaitable[None]] | None:
+    # Older google-genai releases have no aio.aclose(); their pool is left to GC
+    return getattr(client.aio, "aclose", None) if client is not None else None
+
+
+# Minimum seconds between .env mtime checks; SIGHUP (reload()) bypasses it
+ENV_POLL_INTERVAL = 1.0
+
+
+def _env_file_mtime_ns() -> int | None:
+    try:
+        return os.stat(ENV_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
 class LLMClient:
     def __init__(self):
         self.gemini_model = 'gemini-2.5-flash'
-        self.gemini_api_key = settings.gemini_api_key.strip()
-        self.litellm_base_url = settings.litellm_base_url.strip()
-        self.litellm_api_key = settings.litellm_api_key.strip()
-        self.litellm_model = settings.litellm_model.strip()
-        self.litellm_ssl_verify = settings.litellm_ssl_verify
-        self.litellm_ca_bundle = settings.litellm_ca_bundle.strip()
-        self.provider = self._detect_provider()
-        self.gemini_client = genai.Client(api_key=self.gemini_api_key) if self.gemini_api_key else None
-        self.litellm_client = None
-        self._config_signature = self._compute_config_signature()
-
-        if self.provider == "litellm":
-            self.litellm_client = AsyncOpenAI(
-                api_key=self.litellm_api_key,
-                base_url=self._normalize_openai_base_url(self.litellm_base_url),
-            )
-
-        self.client = self.litellm_client if self.provider == "litellm" else self.gemini_client
+        self._env_file_mtime = _env_file_mtime_ns()
+        self._env_checked_at = time.monotonic()
+        self._config_dirty = False
+        self.gemini_client = None
+        self._gemini_client_key = ""
+        # LLM_CACHE_DIR and LLM_HEDGE_AFTER are read at startup only
+        cache_dir = get_settings().llm_cache_dir.strip()
+        self.hedge_after = get_settings().llm_hedge_after
+        # Hedged starts and how many the duplicate won, for tuning LLM_HEDGE_AFTER
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.cache = LLMCache(disk=DiskCache(cache_dir) if cache_dir else None)
+        # Single-flight map: identical concurrent requests share one LLM call.
+        # Checked and claimed without an await in between, so no lock.
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._apply_config(self._read_config(get_settings()))
 
     def _detect_provider(self) -> str | None:
         has_litellm = all([
@@ -95,25 +490,56 @@ class LLMClient:
             return "gemini"
         return None
 
-    def _compute_config_signature(self) -> tuple[str, str, str, str, bool, str]:
+    @staticmethod
+    def _read_config(source: Settings) -> tuple[str, str, str, str, bool, str, bool]:
+        """Normalize provider settings once; the tuple doubles as the config signature."""
         return (
+            source.gemini_api_key.strip(),
+            source.litellm_base_url.strip(),
+            source.litellm_api_key.strip(),
+            source.litellm_model.strip(),
+            source.litellm_ssl_verify,
+            source.litellm_ca_bundle.strip(),
+            source.litellm_gzip_requests,
+        )
+
+    def _apply_config(self, signature: tuple[str, str, str, str, bool, str, bool]) -> None:
+        (
             self.gemini_api_key,
             self.litellm_base_url,
             self.litellm_api_key,
             self.litellm_model,
             self.litellm_ssl_verify,
             self.litellm_ca_bundle,
-        )
+            self.litellm_gzip_requests,
+        ) = signature
+        self.provider = self._detect_provider()
 
-    def _parse_env_bool(self, value: str, default: bool) -> bool:
-        if value is None:
-            return default
-        normalized = value.strip().lower()
-        if normalized in {"1", "true", "yes", "on"}:
-            return True
-        if normalized in {"0", "false", "no", "off"}:
-            return False
-        return default
+        self._sync_gemini_client()
+        # Endpoint URLs only change with config, so derive them here rather than per request
+        self._litellm_base = self._normalize_openai_base_url(self.litellm_base_url) if self.litellm_base_url else ""
+        self._litellm_chat_url = f"{self._litellm_base}/chat/completions"
+        self._litellm_models_url = f"{self._litellm_base}/models"
+        # Same for request headers
+        auth = {"Authorization": f"Bearer {self.litellm_api_key}"}
+        self._litellm_models_headers = {**auth, "Accept": "application/json"}
+        self._litellm_chat_headers = {**auth, "Content-Type": "application/json"}
+        if self.litellm_gzip_requests:
+            self._litellm_chat_headers["Content-Encoding"] = "gzip"
+        self._litellm_stream_headers = {**self._litellm_chat_headers, "Accept": "text/event-stream"}
+        # LiteLLM calls go through the shared pool from get_http(), opened on first use
+        self._http_verify = self._http_verify_option()
+
+        self._config_signature = signature
+        # Cached responses belong to the previous provider/endpoint
+        self.cache.clear()
+
+    def _sync_gemini_client(self) -> None:
+        # The SDK client owns a pooled transport; keep it (and its warm connections) unless the key changed.
+        # A replaced client may still be serving in-flight calls, so it is dropped for GC rather than closed.
+        if self.gemini_api_key != self._gemini_client_key:
+            self.gemini_client = genai.Client(api_key=self.gemini_api_key) if self.gemini_api_key else None
+            self._gemini_client_key = self.gemini_api_key
 
     def _http_verify_option(self):
         if not self.litellm_ssl_verify:
@@ -122,37 +548,60 @@ class LLMClient:
             return self.litellm_ca_bundle
         return True
 
+    @property
+    def _http(self) -> httpx.AsyncClient:
+        return get_http(self._http_verify)
+
+    @property
+    def configured(self) -> bool:
+        """Whether a provider is configured; requests fail with missing_config_message() otherwise."""
+        return self.provider is not None
+
+    async def close(self) -> None:
+        """Close the Gemini SDK client and the shared LiteLLM pools (call on shutdown).
+
+        The client stays usable: the next call rebuilds the Gemini client from
+        the current settings, and get_http() reopens a LiteLLM pool.
+        """
+        gemini_aclose = _gemini_aclose(self.gemini_client)
+        self.gemini_client = None
+        self._gemini_client_key = ""
+        self.reload()
+        await close_shared_http()
+        if gemini_aclose is not None:
+            await gemini_aclose()
+
+    async def __aenter__(self) -> "LLMClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
     def _normalize_openai_base_url(self, base_url: str) -> str:
-        normalized = base_url.strip().rstrip("/")
-        for suffix in ("/chat/completions", "/models"):
-            if normalized.endswith(suffix):
-                normalized = normalized[: -len(suffix)]
-                break
-        return normalized
+        return _OPENAI_ENDPOINT_SUFFIX_RE.sub("", base_url.rstrip("/"), count=1)
+
+    def _request_body(self, payload: dict) -> bytes:
+        """Encode a LiteLLM request body, gzipped when LITELLM_GZIP_REQUESTS is set.
+
+        Prompts carry whole source files, so they compress well; it's opt-in
+        because not every gateway accepts compressed request bodies.
+        """
+        body = dump_llm_json(payload)
+        if self.litellm_gzip_requests:
+            return gzip.compress(body, compresslevel=6)
+        return body
 
     async def _litellm_models_list_http(self) -> None:
-        base_url = self._normalize_openai_base_url(self.litellm_base_url)
-        models_url = f"{base_url}/models"
-        headers = {
-            "Authorization": f"Bearer {self.litellm_api_key}",
-            "Accept": "application/json",
-        }
-        async with httpx.AsyncClient(timeout=20.0, verify=self._http_verify_option()) as client:
-            response = await client.get(models_url, headers=headers)
-            response.raise_for_status()
+        response = await self._http.get(self._litellm_models_url, headers=self._litellm_models_headers, timeout=20.0)
+        response.raise_for_status()
 
     async def _litellm_chat_completion_http(
         self,
         user_prompt: str,
         system_prompt: str,
         max_tokens: int,
+        json_mode: bool = False,
     ) -> tuple[str, TokenUsage]:
-        base_url = self._normalize_openai_base_url(self.litellm_base_url)
-        chat_url = f"{base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.litellm_api_key}",
-            "Content-Type": "application/json",
-        }
         payload = {
             "model": self.litellm_model,
             "messages": [
@@ -163,75 +612,130 @@ class LLMClient:
             "top_p": 1.0,
             "max_tokens": max_tokens,
         }
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
 
-        async with httpx.AsyncClient(timeout=120.0, verify=self._http_verify_option()) as client:
-            response = await client.post(chat_url, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-
-        choices = data.get("choices") or []
-        if not choices:
-            raise Exception("LiteLLM returned empty choices.")
-        message = choices[0].get("message") or {}
-        content = message.get("content")
-        if content is None:
-            raise Exception("LiteLLM returned empty response content.")
-
-        usage_data = data.get("usage") or {}
-        prompt_tokens_details = usage_data.get("prompt_tokens_details") or {}
-        usage = TokenUsage(
-            input_tokens=usage_data.get("prompt_tokens", 0) or 0,
-            output_tokens=usage_data.get("completion_tokens", 0) or 0,
-            total_tokens=usage_data.get("total_tokens", 0) or 0,
-            cached_tokens=prompt_tokens_details.get("cached_tokens", 0) or 0,
+        response = await self._http.post(
+            self._litellm_chat_url, headers=self._litellm_chat_headers, content=self._request_body(payload)
         )
-        return content, usage
+        response.raise_for_status()
+        return decode_chat_completion(response.content)
 
-    def _refresh_from_env_if_needed(self) -> None:
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-        litellm_base_url = os.getenv("LITELLM_BASE_URL")
-        litellm_api_key = os.getenv("LITELLM_API_KEY")
-        litellm_model = os.getenv("LITELLM_MODEL")
-        litellm_ssl_verify = os.getenv("LITELLM_SSL_VERIFY")
-        litellm_ca_bundle = os.getenv("LITELLM_CA_BUNDLE")
-
-        gemini_api_key = self.gemini_api_key if gemini_api_key is None else gemini_api_key.strip()
-        litellm_base_url = self.litellm_base_url if litellm_base_url is None else litellm_base_url.strip()
-        litellm_api_key = self.litellm_api_key if litellm_api_key is None else litellm_api_key.strip()
-        litellm_model = self.litellm_model if litellm_model is None else litellm_model.strip()
-        litellm_ssl_verify = self._parse_env_bool(litellm_ssl_verify, self.litellm_ssl_verify)
-        litellm_ca_bundle = self.litellm_ca_bundle if litellm_ca_bundle is None else litellm_ca_bundle.strip()
-
-        new_signature = (
-            gemini_api_key,
-            litellm_base_url,
-            litellm_api_key,
-            litellm_model,
-            litellm_ssl_verify,
-            litellm_ca_bundle,
-        )
+    async def _litellm_chat_completion_stream_http(
+        self,
+        stream: LLMStream,
+        user_prompt: str,
+        system_prompt: str,
+        max_tokens: int,
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion over SSE, yielding content deltas.
 
-        if new_signature == self._config_signature:
-            return
+        Gateways differ in how much of the streaming API they support: a 400/422
+        naming stream_options is retried once without it, one rejecting stream
+        falls back to a plain completion, and a gateway that ignores stream and
+        answers with a single JSON body has that body decoded instead.
+        """
+        payload = {
+            "model": self.litellm_model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": 0.0,
+            "top_p": 1.0,
+            "max_tokens": max_tokens,
+        }
 
-        self.gemini_api_key = gemini_api_key
-        self.litellm_base_url = litellm_base_url
-        self.litellm_api_key = litellm_api_key
-        self.litellm_model = litellm_model
-        self.litellm_ssl_verify = litellm_ssl_verify
-        self.litellm_ca_bundle = litellm_ca_bundle
-        self.provider = self._detect_provider()
+        for stream_fields in ({"stream": True, "stream_options": {"include_usage": True}}, {"stream": True}):
+            async with self._http.stream(
+                "POST",
+                self._litellm_chat_url,
+                headers=self._litellm_stream_headers,
+                content=self._request_body({**payload, **stream_fields}),
+            ) as response:
+                if response.status_code in (400, 422):
+                    detail = (await response.aread()).decode("utf-8", "replace")
+                    if "stream_options" in stream_fields and "stream_options" in detail:
+                        continue
+                    if "stream" in detail:
+                        break
+                response.raise_for_status()
+                if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                    content, stream.usage = decode_chat_completion(await response.aread())
+                    if content:
+                        yield content
+                    return
+                async with aclosing(self._litellm_sse_content(stream, response)) as chunks:
+                    async for chunk in chunks:
+                        yield chunk
+                return
+
+        # The gateway rejects streaming requests outright
+        content, stream.usage = await self._litellm_chat_completion_http(user_prompt, system_prompt, max_tokens)
+        if content:
+            yield content
+
+    @staticmethod
+    async def _litellm_sse_content(stream: LLMStream, response: httpx.Response) -> AsyncIterator[str]:
+        """Yield the content deltas of an SSE chat completion response."""
+        saw_choices = False
+        saw_content = False
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = parse_llm_json(data)
+            if chunk.get("error"):
+                raise Exception(f"LiteLLM stream error: {chunk['error']}")
+
+            usage_data = chunk.get("usage")
+            if usage_data:
+                stream.usage = litellm_usage(usage_data)
+
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+            saw_choices = True
+            content = (choices[0].get("delta") or {}).get("content")
+            if content is not None:
+                saw_content = True
+                if content:
+                    yield content
+
+        if not saw_choices:
+            raise Exception("LiteLLM returned empty choices.")
+        if not saw_content:
+            raise Exception("LiteLLM returned empty response content.")
 
-        self.gemini_client = genai.Client(api_key=self.gemini_api_key) if self.gemini_api_key else None
-        self.litellm_client = None
-        if self.provider == "litellm":
-            self.litellm_client = AsyncOpenAI(
-                api_key=self.litellm_api_key,
-                base_url=self._normalize_openai_base_url(self.litellm_base_url),
-            )
+    def reload(self) -> None:
+        """Re-read provider configuration on the next LLM call.
 
-        self.client = self.litellm_client if self.provider == "litellm" else self.gemini_client
-        self._config_signature = new_signature
+        Edits to the .env file are picked up automatically; call this (or send
+        SIGHUP) after changing environment variables in a running process.
+        """
+        self._config_dirty = True
+
+    def _refresh_from_env_if_needed(self) -> None:
+        if not self._config_dirty:
+            now = time.monotonic()
+            if now - self._env_checked_at < ENV_POLL_INTERVAL:
+                return
+            self._env_checked_at = now
+            env_file_mtime = _env_file_mtime_ns()
+            if env_file_mtime == self._env_file_mtime:
+                return
+            self._env_file_mtime = env_file_mtime
+        self._config_dirty = False
+
+        get_settings.cache_clear()
+        signature = self._read_config(get_settings())
+        if signature != self._config_signature:
+            self._apply_config(signature)
+        else:
+            # Rebuilds a Gemini client dropped by close()
+            self._sync_gemini_client()
 
     @property
     def model(self) -> str:
@@ -260,6 +764,36 @@ class LLMClient:
         http_connections: str = None
     ) -> tuple[str, TokenUsage, CostData]:
         """Analyze code for LLM workflow patterns using configured LLM provider."""
+        stream = self.analyze_workflow_stream(code, metadata, correction_prompt, http_connections)
+        return await stream.collect()
+
+    async def analyze_many(
+        self,
+        items: list[tuple[str, list]],
+        concurrency: int = 8,
+    ) -> list[tuple[str, TokenUsage, CostData]]:
+        """Analyze several (code, metadata) pairs concurrently, at most `concurrency` in flight.
+
+        Results come back in input order; the first failure cancels the rest.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def analyze_one(code: str, metadata: list) -> tuple[str, TokenUsage, CostData]:
+            async with semaphore:
+                return await self.analyze_workflow(code, metadata)
+
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(analyze_one(code, metadata)) for code, metadata in items]
+        return [task.result() for task in tasks]
+
+    def analyze_workflow_stream(
+        self,
+        code: str,
+        metadata: list = None,
+        correction_prompt: str = None,
+        http_connections: str = None
+    ) -> LLMStream:
+        """Stream workflow analysis text as the configured LLM provider generates it."""
         self._refresh_from_env_if_needed()
         user_prompt = build_user_prompt(code, metadata, http_connections)
 
@@ -268,82 +802,162 @@ class LLMClient:
             user_prompt = f"{user_prompt}\n\n{correction_prompt}"
 
         if self.provider == "litellm":
-            return await self._analyze_with_litellm(user_prompt)
-        if self.provider == "gemini":
-            return await self._analyze_with_gemini(user_prompt)
-        raise Exception(self.missing_config_message())
-
-    async def _analyze_with_gemini(self, user_prompt: str) -> tuple[str, TokenUsage, CostData]:
-        # Use system_instruction parameter (not concatenated into content)
-        config = types.GenerateContentConfig(
-            system_instruction=SYSTEM_INSTRUCTION,
-            temperature=0.0,
-            top_p=1.0,
-            top_k=1,
-            max_output_tokens=65536,
-        )
-
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = await self.gemini_client.aio.models.generate_content(
-                    model=self.gemini_model,
-                    contents=user_prompt,
-                    config=config,
-                )
-
-                # Check finish reason
-                if response.candidates:
-                    finish_reason = response.candidates[0].finish_reason
-                    if finish_reason == 'MAX_TOKENS':
-                        raise Exception("Output exceeded token limit. Try reducing batch size.")
-                    elif finish_reason == 'SAFETY':
-                        raise Exception("Response blocked by safety filters.")
-                    elif finish_reason not in ['STOP', 'UNSPECIFIED', None]:
-                        raise Exception(f"Generation failed: {finish_reason}")
-
-                # Extract usage and calculate cost
-                usage = extract_usage(response)
-                cost = calculate_cost(usage)
-                return response.text, usage, cost
+            produce = lambda stream: self._analyze_with_litellm(stream, user_prompt)
+        elif self.provider == "gemini":
+            produce = lambda stream: self._analyze_with_gemini(stream, user_prompt)
+        else:
+            raise Exception(self.missing_config_message())
+        key = self._cache_key(SYSTEM_INSTRUCTION, user_prompt, 65536)
+        return LLMStream(lambda stream: self._stream_through_cache(key, stream, produce))
+
+    def _cache_key(self, system_prompt: str | None, user_prompt: str, max_tokens: int) -> str:
+        endpoint = self._litellm_base if self.provider == "litellm" else ""
+        return LLMCache.key(self.provider, endpoint, self.model, system_prompt, user_prompt, max_tokens)
+
+    async def _shared_result(self, key: str) -> str | None:
+        """Return a cached or coalesced response for key, or None if the caller must generate it.
+
+        Waits on an identical in-flight request instead of issuing a duplicate
+        one. If that request fails, its waiters raise the same error; if it is
+        abandoned (cancelled, or its stream left unread), they generate their own.
+        """
+        while True:
+            text = await self.cache.get(key)
+            if text is not None:
+                return text
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                return None
+            text = await asyncio.shield(inflight)
+            if text is not None:
+                self.cache.record_coalesced()
+                return text
+
+    def _begin_inflight(self, key: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    def _finish_inflight(
+        self, key: str, future: asyncio.Future, text: str | None, error: Exception | None = None
+    ) -> None:
+        if text is not None:
+            self.cache.set(key, text)
+        if error is not None:
+            future.set_exception(error)
+            # Mark it retrieved: with no waiters nobody else will, and asyncio would log it
+            future.exception()
+        else:
+            future.set_result(text)
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    async def _stream_through_cache(
+        self,
+        key: str,
+        stream: LLMStream,
+        produce: Callable[[LLMStream], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """Serve a cached or coalesced response as one chunk, or pass chunks through and cache the full text.
+
+        Shared responses report zero usage/cost since no tokens were spent;
+        failed or abandoned streams are never cached.
+        """
+        text = await self._shared_result(key)
+        if text is not None:
+            yield text
+            return
+        future = self._begin_inflight(key)
+        error = None
+        try:
+            parts = []
+            async with aclosing(produce(stream)) as chunks:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    yield chunk
+            text = "".join(parts)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._finish_inflight(key, future, text, error)
+
+    async def _call_through_cache(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[tuple[str, TokenUsage, CostData]]],
+    ) -> tuple[str, TokenUsage, CostData]:
+        text = await self._shared_result(key)
+        if text is not None:
+            return text, zero_usage(), zero_cost()
+        future = self._begin_inflight(key)
+        error = None
+        try:
+            text, usage, cost = await call()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._finish_inflight(key, future, text, error)
+        return text, usage, cost
+
+    def _analyze_with_gemini(self, stream: LLMStream, user_prompt: str) -> AsyncIterator[str]:
+        async def open_stream() -> AsyncIterator[str]:
+            response = await self.gemini_client.aio.models.generate_content_stream(
+                model=self.gemini_model,
+                contents=user_prompt,
+                config=ANALYZE_CONFIG,
+            )
 
-            except Exception as e:
-                error_str = str(e)
-                if '429' in error_str or 'quota' in error_str.lower() or 'rate' in error_str.lower():
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        match = re.search(r'retry in ([\d.]+)', error_str, re.IGNORECASE)
-                        if match:
-                            wait_time = float(match.group(1)) / 1000 + 1
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise
-                else:
-                    raise
-
-    async def _analyze_with_litellm(self, user_prompt: str) -> tuple[str, TokenUsage, CostData]:
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                content, usage = await self._litellm_chat_completion_http(
-                    user_prompt=user_prompt,
-                    system_prompt=SYSTEM_INSTRUCTION,
-                    max_tokens=65536,
-                )
-                return content, usage, zero_cost()
-            except Exception as e:
-                error_str = str(e)
-                if '429' in error_str or 'quota' in error_str.lower() or 'rate' in error_str.lower():
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        match = re.search(r'retry in ([\d.]+)', error_str, re.IGNORECASE)
-                        if match:
-                            wait_time = float(match.group(1)) / 1000 + 1
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise
-                else:
-                    raise
+            finish_reason = None
+            async with aclosing(response):
+                async for chunk in response:
+                    if chunk.usage_metadata:
+                        stream.usage = extract_usage(chunk)
+                    if chunk.candidates and chunk.candidates[0].finish_reason:
+                        finish_reason = chunk.candidates[0].finish_reason
+                    if chunk.text:
+                        yield chunk.text
+
+            # Check finish reason
+            if finish_reason == 'MAX_TOKENS':
+                raise Exception("Output exceeded token limit. Try reducing batch size.")
+            elif finish_reason == 'SAFETY':
+                raise Exception("Response blocked by safety filters.")
+            elif finish_reason not in ['STOP', 'UNSPECIFIED', None]:
+                raise Exception(f"Generation failed: {finish_reason}")
+
+            # Calculate cost from the final usage
+            stream.usage = with_abandoned_prompts(stream.usage, stream.abandoned_requests)
+            stream.cost = calculate_cost(stream.usage)
+
+        return _stream_with_retries(open_stream, hedge_after=self.hedge_after, on_hedge=self._hedge_recorder(stream))
+
+    def _analyze_with_litellm(self, stream: LLMStream, user_prompt: str) -> AsyncIterator[str]:
+        async def open_stream() -> AsyncIterator[str]:
+            async with aclosing(self._litellm_chat_completion_stream_http(
+                stream,
+                user_prompt=user_prompt,
+                system_prompt=SYSTEM_INSTRUCTION,
+                max_tokens=65536,
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+            stream.usage = with_abandoned_prompts(stream.usage, stream.abandoned_requests)
+            stream.cost = zero_cost()
+
+        return _stream_with_retries(open_stream, hedge_after=self.hedge_after, on_hedge=self._hedge_recorder(stream))
+
+    def _hedge_recorder(self, stream: LLMStream) -> Callable[[int, bool], None]:
+        def record(abandoned: int, hedge_won: bool) -> None:
+            self.hedges_fired += 1
+            self.hedges_won += hedge_won
+            stream.abandoned_requests += abandoned
+
+        return record
+
+    def hedge_stats(self) -> dict:
+        return {"fired": self.hedges_fired, "won": self.hedges_won}
 
 
     async def condense_repo_structure(self, raw_structure: str) -> tuple[str, TokenUsage, CostData]:
@@ -362,167 +976,126 @@ class LLMClient:
 Output a condensed workflow structure following the system instructions."""
 
         if self.provider == "litellm":
-            return await self._condense_with_litellm(user_prompt)
-        if self.provider == "gemini":
-            return await self._condense_with_gemini(user_prompt)
-        raise Exception(self.missing_config_message())
+            call = lambda: self._condense_with_litellm(user_prompt)
+        elif self.provider == "gemini":
+            call = lambda: self._condense_with_gemini(user_prompt)
+        else:
+            raise Exception(self.missing_config_message())
+        return await self._call_through_cache(self._cache_key(CONDENSATION_SYSTEM_PROMPT, user_prompt, 8192), call)
 
     async def _condense_with_gemini(self, user_prompt: str) -> tuple[str, TokenUsage, CostData]:
-        config = types.GenerateContentConfig(
-            system_instruction=CONDENSATION_SYSTEM_PROMPT,
-            temperature=0.0,
-            top_p=1.0,
-            top_k=1,
-            max_output_tokens=8192,
-        )
+        async def request():
+            response = await self.gemini_client.aio.models.generate_content(
+                model=self.gemini_model,
+                contents=user_prompt,
+                config=CONDENSE_CONFIG,
+            )
+            # Extract usage and calculate cost
+            usage = extract_usage(response)
+            cost = calculate_cost(usage)
+            return response.text, usage, cost
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = await self.gemini_client.aio.models.generate_content(
-                    model=self.gemini_model,
-                    contents=user_prompt,
-                    config=config,
-                )
-                # Extract usage and calculate cost
-                usage = extract_usage(response)
-                cost = calculate_cost(usage)
-                return response.text, usage, cost
-            except Exception as e:
-                error_str = str(e)
-                if '429' in error_str or 'quota' in error_str.lower():
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise
-                else:
-                    raise
+        return await _call_with_retries(request, _QUOTA_RE, use_retry_hint=False)
 
     async def _condense_with_litellm(self, user_prompt: str) -> tuple[str, TokenUsage, CostData]:
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                content, usage = await self._litellm_chat_completion_http(
-                    user_prompt=user_prompt,
-                    system_prompt=CONDENSATION_SYSTEM_PROMPT,
-                    max_tokens=8192,
-                )
-                return content, usage, zero_cost()
-            except Exception as e:
-                error_str = str(e)
-                if '429' in error_str or 'quota' in error_str.lower():
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise
-                else:
-                    raise
+        async def request():
+            content, usage = await self._litellm_chat_completion_http(
+                user_prompt=user_prompt,
+                system_prompt=CONDENSATION_SYSTEM_PROMPT,
+                max_tokens=8192,
+            )
+            return content, usage, zero_cost()
+
+        return await _call_with_retries(request, _QUOTA_RE, use_retry_hint=False)
 
 
     async def generate_metadata(self, prompt: str) -> tuple[str, TokenUsage, CostData]:
         """Generate metadata using a simple prompt (no workflow analysis).
 
         Used for incremental updates where we just need labels/descriptions.
+        Requests JSON output from the provider.
         """
         self._refresh_from_env_if_needed()
         if self.provider == "litellm":
-            return await self._generate_metadata_with_litellm(prompt)
-        if self.provider == "gemini":
-            return await self._generate_metadata_with_gemini(prompt)
-        raise Exception(self.missing_config_message())
+            call = lambda: self._generate_metadata_with_litellm(prompt)
+        elif self.provider == "gemini":
+            call = lambda: self._generate_metadata_with_gemini(prompt)
+        else:
+            raise Exception(self.missing_config_message())
+        return await self._call_through_cache(self._cache_key(None, prompt, 8192), call)
 
     async def _generate_metadata_with_gemini(self, prompt: str) -> tuple[str, TokenUsage, CostData]:
-        config = types.GenerateContentConfig(
-            temperature=0.0,
-            top_p=1.0,
-            top_k=1,
-            max_output_tokens=8192,
-        )
+        async def request():
+            response = await self.gemini_client.aio.models.generate_content(
+                model=self.gemini_model,
+                contents=prompt,
+                config=METADATA_CONFIG,
+            )
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = await self.gemini_client.aio.models.generate_content(
-                    model=self.gemini_model,
-                    contents=prompt,
-                    config=config,
-                )
-
-                # Check finish reason
-                if response.candidates:
-                    finish_reason = response.candidates[0].finish_reason
-                    if finish_reason == 'SAFETY':
-                        raise Exception("Response blocked by safety filters.")
-                    elif finish_reason not in ['STOP', 'UNSPECIFIED', None, 'MAX_TOKENS']:
-                        raise Exception(f"Generation failed: {finish_reason}")
-
-                usage = extract_usage(response)
-                cost = calculate_cost(usage)
-                return response.text, usage, cost
+            # Check finish reason
+            if response.candidates:
+                finish_reason = response.candidates[0].finish_reason
+                if finish_reason == 'SAFETY':
+                    raise Exception("Response blocked by safety filters.")
+                elif finish_reason not in ['STOP', 'UNSPECIFIED', None, 'MAX_TOKENS']:
+                    raise Exception(f"Generation failed: {finish_reason}")
 
-            except Exception as e:
-                error_str = str(e)
-                if '429' in error_str or 'quota' in error_str.lower():
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise
-                else:
-                    raise
+            usage = extract_usage(response)
+            cost = calculate_cost(usage)
+            return response.text, usage, cost
+
+        return await _call_with_retries(request, _QUOTA_RE, use_retry_hint=False)
 
     async def _generate_metadata_with_litellm(self, prompt: str) -> tuple[str, TokenUsage, CostData]:
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                content, usage = await self._litellm_chat_completion_http(
-                    user_prompt=prompt,
-                    system_prompt="You are a helpful assistant.",
-                    max_tokens=8192,
-                )
-                return content, usage, zero_cost()
+        async def request():
+            content, usage = await self._litellm_chat_completion_http(
+                user_prompt=prompt,
+                system_prompt="You are a helpful assistant.",
+                max_tokens=8192,
+                json_mode=True,
+            )
+            return content, usage, zero_cost()
 
-            except Exception as e:
-                error_str = str(e)
-                if '429' in error_str or 'quota' in error_str.lower():
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        await asyncio.sleep(wait_time)
-                    else:
-                        raise
-                else:
-                    raise
+        return await _call_with_retries(request, _QUOTA_RE, use_retry_hint=False)
 
     async def check_health(self) -> str:
         """Check provider credential validity: valid, invalid, or missing."""
         self._refresh_from_env_if_needed()
         if self.provider == "litellm":
+            # models.list is free; only pay for a completion probe if it fails or is slow to answer
+            list_task = asyncio.create_task(self._litellm_models_list_http())
+            pending = {list_task}
             try:
-                await self._litellm_models_list_http()
-                return "valid"
-            except Exception as e:
-                list_error = e
-
-            try:
-                await self._litellm_chat_completion_http(
+                await asyncio.wait(pending, timeout=_HEALTH_COMPLETION_HEDGE)
+                if list_task.done() and list_task.exception() is None:
+                    return "valid"
+                completion_task = asyncio.create_task(self._litellm_chat_completion_http(
                     user_prompt="health check",
                     system_prompt="You are a health check assistant.",
                     max_tokens=1,
-                )
-                return "valid"
-            except Exception as completion_error:
-                print(
-                    "[HEALTH] LiteLLM config invalid: "
-                    f"models.list failed ({list_error}); "
-                    f"chat.completions.create failed ({completion_error})"
-                )
-                return "invalid"
+                ))
+                pending = {task for task in (list_task, completion_task) if not task.done()}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    # Check every finished task so no exception goes unretrieved
+                    if [task for task in done if task.exception() is None]:
+                        return "valid"
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+            print(
+                "[HEALTH] LiteLLM config invalid: "
+                f"models.list failed ({list_task.exception()}); "
+                f"chat.completions.create failed ({completion_task.exception()})"
+            )
+            return "invalid"
 
         if self.provider == "gemini":
             try:
-                list(self.gemini_client.models.list())
+                # Async SDK call on the Gemini pool; one page is enough to prove the key works
+                await self.gemini_client.aio.models.list(config={"page_size": 1})
                 return "valid"
             except Exception as e:
                 print(f"[HEALTH] Gemini API key invalid: {e}")
@@ -533,3 +1106,7 @@ Output a condensed workflow structure following the system instructions."""
 
 llm_client = LLMClient()
 gemini_client = llm_client
+
+# SIGHUP asks the running server to pick up changed provider configuration
+if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+    signal.signal(signal.SIGHUP, lambda signum, frame: llm_client.reload())
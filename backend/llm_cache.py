@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+
+class DiskCache:
+    """Content-addressed response files, shared across restarts and workers.
+
+    Entries live at <directory>/<key[:2]>/<key>.txt and expire by mtime.
+    Expired files are removed when read, and once more than max_entries
+    files exist the oldest by mtime are pruned on write.
+    Any filesystem error is treated as a miss, and an undecodable file is
+    removed like an expired one; the cache is best-effort.
+    clock returns the wall time mtimes are compared with.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = 86400.0,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.directory = Path(directory).expanduser()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._count: int | None = None  # Files on disk, counted lazily on first write
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            if self.clock() - path.stat().st_mtime >= self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_text(encoding="utf-8", errors="surrogatepass")
+        except UnicodeDecodeError:
+            # Not something set() wrote; drop it so the next response replaces it
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+        except OSError:
+            return None
+
+    def set(self, key: str, text: str) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            # Write then rename so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8", errors="surrogatepass") as fp:
+                    fp.write(text)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            return
+        with self._lock:
+            if self._count is None:
+                self._count = sum(1 for _ in self._entry_files())
+            elif not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._prune()
+
+    def _entry_files(self):
+        return self.directory.glob("??/*.txt")
+
+    def _prune(self) -> None:
+        """Drop expired files, then the oldest until 90% of max_entries remain.
+
+        Pruning below the cap means the directory scan runs once per batch of
+        writes rather than on every write past the limit.
+        """
+        now = self.clock()
+        entries = []
+        for path in self._entry_files():
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((mtime, path))
+        entries.sort()
+        keep = self.max_entries * 9 // 10
+        excess = len(entries) - keep
+        removed = 0
+        for index, (mtime, path) in enumerate(entries):
+            if index >= excess and now - mtime < self.ttl:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            removed += 1
+        self._count = len(entries) - removed
+
+
+class LLMCache:
+    """LRU + TTL cache of LLM response text.
+
+    Every request is sent with temperature 0 / top_k 1, so a repeated
+    (provider, endpoint, model, system prompt, prompt, max_tokens) request
+    can be answered locally instead of paying for another generation.
+    An optional DiskCache behind the in-memory LRU keeps hits across restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, disk: DiskCache | None = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    @staticmethod
+    def key(
+        provider: str,
+        endpoint: str,
+        model: str,
+        system_prompt: str | None,
+        user_prompt: str,
+        max_tokens: int,
+    ) -> str:
+        payload = json.dumps(
+            {
+                "provider": provider,
+                "endpoint": endpoint,
+                "model": model,
+                "sys": system_prompt,
+                "usr": user_prompt,
+                "max": max_tokens,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _memory_get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _memory_set(self, key: str, text: str) -> None:
+        self._entries[key] = (text, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> str | None:
+        """Look up key in memory, then on disk (off the event loop)."""
+        text = self._memory_get(key)
+        if text is not None:
+            self.hits += 1
+            return text
+        if self.disk is not None:
+            text = await asyncio.to_thread(self.disk.get, key)
+            if text is not None:
+                self._memory_set(key, text)
+                self.disk_hits += 1
+                return text
+        self.misses += 1
+        return None
+
+    def set(self, key: str, text: str) -> None:
+        self._memory_set(key, text)
+        if self.disk is not None:
+            try:
+                asyncio.get_running_loop().run_in_executor(None, self.disk.set, key, text)
+            except RuntimeError:
+                self.disk.set(key, text)  # No running loop: write inline
+
+    def record_coalesced(self) -> None:
+        """Recount the last miss as a lookup served by an identical in-flight request."""
+        self.misses -= 1
+        self.coalesced += 1
+
+    def clear(self) -> None:
+        """Drop in-memory entries; disk entries are keyed by endpoint and stay valid."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+        }
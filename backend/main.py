@@ -1,9 +1,28 @@
 import argparse
 import asyncio
-from fastapi import FastAPI, HTTPException
+from contextlib import aclosing, asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+import io
+import itertools
 import json
+import re
 import sys
+from typing import Iterator
+
+try:
+    import orjson  # noqa: F401 - only probed; ORJSONResponse needs it installed
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    DEFAULT_RESPONSE_CLASS = JSONResponse
+
+try:
+    import ijson
+except ImportError:  # optional incremental parser for metadata responses
+    ijson = None
 
 from models import (
     AnalyzeRequest, WorkflowGraph,
@@ -11,12 +30,170 @@ from models import (
     CondenseRequest,
     TokenUsage, CostData, AnalyzeResponse
 )
-from prompts import build_metadata_only_prompt, USE_MERMAID_FORMAT
-from mermaid_parser import parse_mermaid_response
-from gemini_client import llm_client
+from prompts import build_metadata_only_prompt, MERMAID_CORRECTION_REMINDER, USE_MERMAID_FORMAT
+from mermaid_parser import parse_mermaid_response, repair_mermaid_response
+from config import get_settings
+from gemini_client import llm_client, parse_llm_json
+
+# Markdown fence wrappers LLMs put around responses, stripped in one pass.
+# Both always match (every part is optional); group 1 is the unwrapped body.
+# Mermaid: drop an opening ``` line (```mermaid etc.) and a trailing ```.
+_MERMAID_FENCE_RE = re.compile(r'\A(?:```[^\n]*\n|```)?(.*?)(?:```)?\Z', re.DOTALL)
+# JSON: drop a leading ```json and/or ``` and a trailing ```.
+_JSON_FENCE_RE = re.compile(r'\A(?:```json)?(?:```)?(.*?)(?:```)?\Z', re.DOTALL)
+
+# A string literal (group 1 is its closing quote, absent if cut off), a structural
+# character, or a bare number/true/false/null
+_JSON_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*(")?|[{}\[\],:]|[^\s"{}\[\],:]+')
+_JSON_CLOSERS = {'{': '}', '[': ']'}
+# Progress of the member a container is currently reading
+_MEMBER_EMPTY, _MEMBER_KEY, _MEMBER_COLON, _MEMBER_DONE = range(4)
+
+
+def _close_truncated_json(text: str) -> str:
+    """Close a JSON document the model stopped writing midway.
+
+    One regex pass over the tokens skips string literals, so brackets inside
+    strings aren't counted. Unless the innermost container's trailing member is
+    complete (a dangling key, a cut-off string, a scalar at the very end that
+    may have lost characters), it is dropped rather than given a made-up value.
+    Open containers are then closed innermost first.
+    """
+    text = text.rstrip()
+    # One [closer, offset the current member starts at, member progress] per open container
+    frames = []
+    for match in _JSON_TOKEN_RE.finditer(text):
+        token = match.group()
+        if token in _JSON_CLOSERS:
+            frames.append([_JSON_CLOSERS[token], match.end(), _MEMBER_EMPTY])
+            continue
+        if not frames:
+            continue
+        frame = frames[-1]
+        if token in ('}', ']'):
+            frames.pop()
+            if frames:
+                frames[-1][2] = _MEMBER_DONE
+        elif token == ',':
+            frame[1], frame[2] = match.end(), _MEMBER_EMPTY
+        elif token == ':':
+            frame[2] = _MEMBER_COLON
+        elif match.end() == len(text) and (token[0] != '"' or match.group(1) is None):
+            # Cut off mid-value; this is the last token
+            frame[2] = _MEMBER_EMPTY
+        elif frame[0] == '}' and frame[2] == _MEMBER_EMPTY:
+            frame[2] = _MEMBER_KEY
+        else:
+            frame[2] = _MEMBER_DONE
+    if not frames:
+        return text
+    if frames[-1][2] != _MEMBER_DONE:
+        text = text[:frames[-1][1]].rstrip().removesuffix(',')
+    return text + ''.join(frame[0] for frame in reversed(frames))
+
+
+def _metadata_files(text: str) -> Iterator[dict]:
+    """Yield each entry of a metadata response's "files" array.
+
+    With ijson installed entries are parsed one at a time instead of
+    materializing the whole document. A truncated response is closed with
+    the missing brackets and parsed again, skipping entries already yielded.
+    """
+    yielded = 0
+    if ijson is not None:
+        try:
+            for file_data in ijson.items(io.BytesIO(text.encode("utf-8", "surrogatepass")), "files.item"):
+                yielded += 1
+                yield file_data
+            return
+        except ijson.JSONError:
+            pass
+
+    try:
+        metadata_data = parse_llm_json(text)
+    except json.JSONDecodeError:
+        # Try to recover a response cut off mid-document
+        metadata_data = parse_llm_json(_close_truncated_json(text))
+    yield from itertools.islice(metadata_data.get('files', []), yielded, None)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Caps concurrent /analyze generations (retries included); read once at startup.
+    # Created here so it belongs to the server's event loop.
+    app.state.analyze_semaphore = asyncio.Semaphore(max(1, get_settings().analyze_concurrency))
+    yield
+    await llm_client.close()
+
+
+# /analyze input limits
+MAX_CODE_SIZE = 5_000_000  # 5MB limit
+MAX_FILES = 50  # Reasonable limit on number of files
+# Whole-body cap, enforced before the JSON is parsed; looser than MAX_CODE_SIZE
+# because JSON escaping and metadata add to the size of the code itself
+MAX_ANALYZE_BODY_BYTES = 4 * MAX_CODE_SIZE
+
+
+class BodySizeLimitMiddleware:
+    """Reject an oversized request body with 413 while it is still arriving.
+
+    Content-Length is checked up front; bodies without one are counted chunk
+    by chunk, so an oversized upload is never buffered and parsed in full.
+    """
 
-app = FastAPI(title="Codag")
+    def __init__(self, app, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
 
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            {"detail": f"Request body exceeds maximum allowed size ({self.max_bytes} bytes). Try analyzing fewer files or smaller files."},
+            status_code=413,
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    await self._reject(scope, receive, send)
+                    # The app sees a disconnect and stops reading the body
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # An app that reads the body raises on the injected disconnect; the 413 already went out
+            if not rejected:
+                raise
+
+
+app = FastAPI(title="Codag", lifespan=lifespan, default_response_class=DEFAULT_RESPONSE_CLASS)
+
+# Added first so CORSMiddleware wraps it and 413s carry CORS headers too
+app.add_middleware(BodySizeLimitMiddleware, path="/analyze", max_bytes=MAX_ANALYZE_BODY_BYTES)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,24 +207,110 @@ app.add_middleware(
 # Analysis Endpoint
 # =============================================================================
 
+# How often a streaming analysis checks whether the HTTP client is still there
+DISCONNECT_POLL_SECONDS = 1.0
+
+# Batches smaller than this are dumped inline; a thread hop would cost more than the work
+OFFLOAD_MIN_ITEMS = 64
+
+
+def _dump_all(models: list) -> list[dict]:
+    return [m.model_dump() for m in models]
+
+
+# Serializes metadata-only results straight to JSON bytes, skipping the dict round trip
+_FILE_RESULTS_JSON = TypeAdapter(list[FileMetadataResult])
+
+
+async def _offload_if_large(size: int, func, *args):
+    """Run func(*args) in a worker thread when size warrants it, else inline.
+
+    The worker still takes the GIL, but the interpreter's switch interval
+    hands it back to the event loop regularly, so other requests keep moving.
+    """
+    if size < OFFLOAD_MIN_ITEMS:
+        return func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
+@dataclass(slots=True)
+class _SpendTotals:
+    """Usage/cost summed over an analysis and its retries; models are built only for the response."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    cached_tokens: int = 0
+    input_cost: float = 0.0
+    output_cost: float = 0.0
+    total_cost: float = 0.0
+
+    def add(self, usage: TokenUsage, cost: CostData) -> None:
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+        self.total_tokens += usage.total_tokens
+        self.cached_tokens += usage.cached_tokens
+        self.input_cost += cost.input_cost
+        self.output_cost += cost.output_cost
+        self.total_cost += cost.total_cost
+
+    # Sums of already-validated fields, so the models skip validation
+    def usage(self) -> TokenUsage:
+        return TokenUsage.model_construct(
+            input_tokens=self.input_tokens,
+            output_tokens=self.output_tokens,
+            total_tokens=self.total_tokens,
+            cached_tokens=self.cached_tokens,
+        )
+
+    def cost(self) -> CostData:
+        return CostData.model_construct(input_cost=self.input_cost, output_cost=self.output_cost, total_cost=self.total_cost)
+
+
+async def _collect_analysis(http_request: Request | None, *args, **kwargs) -> tuple[str, TokenUsage, CostData]:
+    """Collect a streamed analysis, stopping generation early if the HTTP client disconnects."""
+    # Unlimited outside the server (CLI runs, apps used without their lifespan)
+    semaphore = getattr(app.state, "analyze_semaphore", None)
+    async with semaphore if semaphore is not None else nullcontext():
+        stream = llm_client.analyze_workflow_stream(*args, **kwargs)
+        if http_request is None:
+            return await stream.collect()
+
+        loop = asyncio.get_running_loop()
+        next_poll = loop.time() + DISCONNECT_POLL_SECONDS
+        parts = []
+        # Closing the stream closes the upstream connection, so the provider stops generating
+        async with aclosing(aiter(stream)) as chunks:
+            async for chunk in chunks:
+                parts.append(chunk)
+                if loop.time() >= next_poll:
+                    if await http_request.is_disconnected():
+                        raise HTTPException(status_code=499, detail="Client disconnected")
+                    next_poll = loop.time() + DISCONNECT_POLL_SECONDS
+        return "".join(parts), stream.usage, stream.cost
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_workflow(
     request: AnalyzeRequest,
+    http_request: Request = None,
 ):
     """
     Analyze code for LLM workflow patterns.
     """
-    if not llm_client.client:
+    response = await run_analysis(request, http_request)
+    # Serialized once here; a returned model would be dumped and re-validated against response_model first
+    return Response(content=response.model_dump_json(), media_type="application/json")
+
+
+async def run_analysis(request: AnalyzeRequest, http_request: Request | None = None) -> AnalyzeResponse:
+    """Run /analyze and return the response model (shared by the endpoint and the CLI)."""
+    if not llm_client.configured:
         raise HTTPException(status_code=503, detail=llm_client.missing_config_message())
 
     # Track cumulative cost across retries
-    total_usage = TokenUsage(input_tokens=0, output_tokens=0, total_tokens=0, cached_tokens=0)
-    total_cost = CostData(input_cost=0.0, output_cost=0.0, total_cost=0.0)
+    spent = _SpendTotals()
 
     # Input validation
-    MAX_CODE_SIZE = 5_000_000  # 5MB limit
-    MAX_FILES = 50  # Reasonable limit on number of files
-
     if len(request.code) > MAX_CODE_SIZE:
         raise HTTPException(
             status_code=413,
@@ -61,45 +324,22 @@ async def analyze_workflow(
         )
 
     # Convert metadata to dict format
-    metadata_dicts = [m.model_dump() for m in request.metadata] if request.metadata else None
-
-    # Helper to accumulate usage/cost
-    def accumulate_cost(usage: TokenUsage, cost: CostData):
-        nonlocal total_usage, total_cost
-        total_usage = TokenUsage(
-            input_tokens=total_usage.input_tokens + usage.input_tokens,
-            output_tokens=total_usage.output_tokens + usage.output_tokens,
-            total_tokens=total_usage.total_tokens + usage.total_tokens,
-            cached_tokens=total_usage.cached_tokens + usage.cached_tokens
-        )
-        total_cost = CostData(
-            input_cost=total_cost.input_cost + cost.input_cost,
-            output_cost=total_cost.output_cost + cost.output_cost,
-            total_cost=total_cost.total_cost + cost.total_cost
-        )
+    metadata_dicts = (
+        await _offload_if_large(len(request.metadata), _dump_all, request.metadata)
+        if request.metadata else None
+    )
 
     # LLM analysis
     try:
-        result, usage, cost = await llm_client.analyze_workflow(
+        result, usage, cost = await _collect_analysis(
+            http_request,
             request.code,
             metadata_dicts,
             http_connections=request.http_connections
         )
-        accumulate_cost(usage, cost)
+        spent.add(usage, cost)
         result = result.strip()
 
-        # Helper to fix file paths from LLM (handles both relative and mangled absolute paths)
-        def fix_file_path(path: str, file_paths: list) -> str:
-            if not path:
-                return path
-            if path in file_paths:
-                return path
-            filename = path.split('/')[-1]
-            for input_path in file_paths:
-                if input_path.endswith('/' + filename):
-                    return input_path
-            return path
-
         # Parse response based on format
         if USE_MERMAID_FORMAT:
             # Parse Mermaid + Metadata format with retry on failure
@@ -107,44 +347,38 @@ async def analyze_workflow(
 
             for attempt in range(MAX_RETRIES + 1):
                 # Strip markdown wrappers if present
-                clean_result = result
-                if clean_result.startswith("```"):
-                    clean_result = clean_result.split("\n", 1)[1] if "\n" in clean_result else clean_result[3:]
-                if clean_result.endswith("```"):
-                    clean_result = clean_result.rsplit("```", 1)[0]
+                clean_result = _MERMAID_FENCE_RE.match(result).group(1)
 
                 try:
                     graph = parse_mermaid_response(clean_result.strip())
                     break  # Success - exit retry loop
                 except ValueError as e:
+                    # Try cheap local fixes before paying for another LLM round trip
+                    repaired = repair_mermaid_response(clean_result)
+                    if repaired is not None:
+                        try:
+                            graph = parse_mermaid_response(repaired)
+                            break
+                        except ValueError:
+                            pass
                     if attempt < MAX_RETRIES:
                         # Retry with a correction prompt
-                        correction_prompt = f"""Your previous response could not be parsed. Error: {str(e)[:200]}
-
-CRITICAL FORMAT REMINDER:
-1. Output RAW TEXT only - NO markdown backticks
-2. Mermaid diagram(s) FIRST, then "---" separator, then "metadata:" section
-3. The metadata section must be valid YAML
-
-Example format:
-flowchart TD
-    %% Workflow: Example
-    A[Step] --> B([LLM])
-
----
-metadata:
-A: {{file: "file.py", line: 1, function: "func", type: "step"}}
-B: {{file: "file.py", line: 10, function: "llm", type: "llm"}}
-
-Please re-analyze the code and output in the CORRECT format."""
+                        correction_prompt = (
+                            f"Your previous response could not be parsed. Error: {str(e)[:200]}\n\n"
+                            + MERMAID_CORRECTION_REMINDER
+                        )
                         try:
-                            result, retry_usage, retry_cost = await llm_client.analyze_workflow(
+                            result, retry_usage, retry_cost = await _collect_analysis(
+                                http_request,
                                 request.code,
                                 metadata_dicts,
                                 correction_prompt
                             )
-                            accumulate_cost(retry_usage, retry_cost)
+                            spent.add(retry_usage, retry_cost)
                             result = result.strip()
+                        except HTTPException:
+                            # e.g. the 499 for a client that went away mid-retry
+                            raise
                         except Exception as retry_err:
                             raise HTTPException(
                                 status_code=500,
@@ -159,14 +393,24 @@ Please re-analyze the code and output in the CORRECT format."""
 
             # Empty graph is valid - code has no LLM calls
             if not graph.nodes:
-                return AnalyzeResponse(graph=graph, usage=total_usage, cost=total_cost)
+                return AnalyzeResponse.model_construct(graph=graph, usage=spent.usage(), cost=spent.cost())
+
+            # Fix file paths from LLM (handles both relative and mangled absolute paths)
+            # Lookups are built once per request instead of scanning file_paths for every node
+            paths_by_filename = {}
+            for input_path in request.file_paths:
+                if '/' in input_path:
+                    paths_by_filename.setdefault(input_path.rsplit('/', 1)[1], input_path)
 
-            # Fix file paths in nodes
-            for node in graph.nodes:
-                if node.source and node.source.file:
-                    node.source.file = fix_file_path(node.source.file, request.file_paths)
+            # Without a basename to map to, every path would come back unchanged
+            if paths_by_filename:
+                known_paths = set(request.file_paths)
+                for node in graph.nodes:
+                    path = node.source.file if node.source else None
+                    if path and path not in known_paths:
+                        node.source.file = paths_by_filename.get(path.split('/')[-1], path)
 
-            return AnalyzeResponse(graph=graph, usage=total_usage, cost=total_cost)
+            return AnalyzeResponse.model_construct(graph=graph, usage=spent.usage(), cost=spent.cost())
 
     except HTTPException:
         raise
@@ -182,11 +426,12 @@ async def analyze_metadata_only(request: MetadataRequest):
     Structure is already known from local tree-sitter analysis.
     Only needs LLM for human-readable labels and descriptions.
     """
-    if not llm_client.client:
+    if not llm_client.configured:
         raise HTTPException(status_code=503, detail=llm_client.missing_config_message())
     # Build prompt from structure context
-    files_data = [f.model_dump() for f in request.files]
-    prompt = build_metadata_only_prompt(files_data)
+    prompt = await _offload_if_large(
+        len(request.files), lambda: build_metadata_only_prompt(_dump_all(request.files))
+    )
 
     # Add code context if provided
     if request.code:
@@ -196,48 +441,36 @@ async def analyze_metadata_only(request: MetadataRequest):
         result, usage, cost = await llm_client.generate_metadata(prompt)
 
         # Clean markdown if present
-        result = result.strip()
-        if result.startswith("```json"):
-            result = result[7:]
-        if result.startswith("```"):
-            result = result[3:]
-        if result.endswith("```"):
-            result = result[:-3]
-
-        # Parse response
-        try:
-            metadata_data = json.loads(result.strip())
-        except json.JSONDecodeError:
-            # Try to recover
-            result_clean = result.strip()
-            open_braces = result_clean.count('{') - result_clean.count('}')
-            open_brackets = result_clean.count('[') - result_clean.count(']')
-            result_clean += ']' * max(0, open_brackets)
-            result_clean += '}' * max(0, open_braces)
-            metadata_data = json.loads(result_clean)
-
-        # Convert to response model
+        result = _JSON_FENCE_RE.match(result.strip()).group(1)
+
+        # Parse response and convert to response model, one file at a time
         files_result = []
-        for file_data in metadata_data.get('files', []):
+        for file_data in _metadata_files(result.strip()):
+            # `or` rather than a .get default: the model sometimes writes explicit nulls
             functions = [
                 FunctionMetadata(
-                    name=f.get('name', ''),
-                    label=f.get('label', f.get('name', '')),
-                    description=f.get('description', '')
+                    name=f.get('name') or '',
+                    label=f.get('label') or f.get('name') or '',
+                    description=f.get('description') or ''
                 )
-                for f in file_data.get('functions', [])
+                for f in file_data.get('functions') or []
             ]
             files_result.append(FileMetadataResult(
-                filePath=file_data.get('filePath', ''),
+                filePath=file_data.get('filePath') or '',
                 functions=functions,
-                edgeLabels=file_data.get('edgeLabels', {})
+                edgeLabels=file_data.get('edgeLabels') or {}
             ))
 
-        return {
-            "files": [f.model_dump() for f in files_result],
-            "usage": usage.model_dump(),
-            "cost": cost.model_dump()
-        }
+        files_json = await _offload_if_large(len(files_result), _FILE_RESULTS_JSON.dump_json, files_result)
+        return Response(
+            content=b''.join((
+                b'{"files":', files_json,
+                b',"usage":', usage.model_dump_json().encode(),
+                b',"cost":', cost.model_dump_json().encode(),
+                b'}',
+            )),
+            media_type="application/json",
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Metadata analysis failed: {str(e)}")
@@ -252,7 +485,7 @@ async def condense_structure(request: CondenseRequest):
     2. Identify LLM/AI workflow entry points
     3. Create condensed structure for cross-batch context
     """
-    if not llm_client.client:
+    if not llm_client.configured:
         raise HTTPException(status_code=503, detail=llm_client.missing_config_message())
     try:
         condensed, usage, cost = await llm_client.condense_repo_structure(request.raw_structure)
@@ -278,14 +511,36 @@ async def health():
     }
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the in-process LLM response cache, plus hedged-start counts."""
+    return {"stats": llm_client.cache.stats(), "hedges": llm_client.hedge_stats()}
+
+
 def _read_text_file(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as fp:
-        return fp.read()
+    # One read and one decode; universal-newline translation only if the file has \r
+    with open(path, "rb") as fp:
+        text = fp.read().decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
 
+def _combine_source_files(paths: list) -> str:
+    """Combine source files into one prompt, in the extension's <file path="..."> format.
 
-def _load_json_from_text(raw_text: str, source_name: str):
+    Analyzing several files in a single request shares the system prompt and
+    one round trip instead of paying for each file separately.
+    """
+    return "\n\n".join(
+        f'<file path="{path}">\n{_read_text_file(path)}\n</file>'
+        for path in paths
+    )
+
+
+def _load_json_from_text(raw_text: str | bytes, source_name: str):
     try:
-        return json.loads(raw_text)
+        return parse_llm_json(raw_text)
     except json.JSONDecodeError as exc:
         raise ValueError(f"Invalid JSON in {source_name}: {exc}") from exc
 
@@ -296,8 +551,9 @@ def _build_cli_analyze_request(args: argparse.Namespace) -> AnalyzeRequest:
             raw_text = sys.stdin.read()
             payload = _load_json_from_text(raw_text, "stdin")
         else:
-            raw_text = _read_text_file(args.request_json)
-            payload = _load_json_from_text(raw_text, args.request_json)
+            # Parsed straight from bytes; no intermediate str copy of the request
+            with open(args.request_json, "rb") as fp:
+                payload = _load_json_from_text(fp.read(), args.request_json)
         return AnalyzeRequest.model_validate(payload)
 
     if args.metadata_json and args.metadata_file:
@@ -306,24 +562,30 @@ def _build_cli_analyze_request(args: argparse.Namespace) -> AnalyzeRequest:
     if args.http_connections and args.http_connections_file:
         raise ValueError("Use only one of --http-connections or --http-connections-file")
 
+    source_files = [path for path in (args.source_file or []) if path]
+    if source_files and (args.code or args.code_file):
+        raise ValueError("Use only one of --source-file or --code/--code-file")
+
     code = (args.code or "").strip()
     if not code and args.code_file:
         code = _read_text_file(args.code_file)
+    if not code and source_files:
+        code = _combine_source_files(source_files)
     if not code:
-        raise ValueError("code is required (use --code, --code-file, or --request-json)")
+        raise ValueError("code is required (use --code, --code-file, --source-file, or --request-json)")
 
-    file_paths = []
+    file_paths = list(source_files)
     for item in args.file_path or []:
         normalized = (item or "").strip()
-        if normalized:
+        if normalized and normalized not in file_paths:
             file_paths.append(normalized)
     if args.file_paths:
         for item in args.file_paths.split(","):
             normalized = item.strip()
-            if normalized:
+            if normalized and normalized not in file_paths:
                 file_paths.append(normalized)
     if not file_paths:
-        raise ValueError("file_paths is required (use --file-path/--file-paths or --request-json)")
+        raise ValueError("file_paths is required (use --file-path/--file-paths, --source-file, or --request-json)")
 
     metadata = []
     if args.metadata_json:
@@ -364,16 +626,13 @@ async def _run_cli_analyze(args: argparse.Namespace) -> int:
         return 2
 
     try:
-        response = await analyze_workflow(request)
+        response = await run_analysis(request)
     except HTTPException as exc:
         print(json.dumps({"status_code": exc.status_code, "detail": exc.detail}, ensure_ascii=False), file=sys.stderr)
         return 1
 
-    body = response.model_dump()
-    if args.pretty:
-        output_text = json.dumps(body, ensure_ascii=False, indent=2)
-    else:
-        output_text = json.dumps(body, ensure_ascii=False)
+    # Serialized by pydantic-core directly, without building the dict first
+    output_text = response.model_dump_json(indent=2 if args.pretty else None)
 
     if args.output:
         with open(args.output, "w", encoding="utf-8") as fp:
@@ -383,6 +642,13 @@ async def _run_cli_analyze(args: argparse.Namespace) -> int:
     return 0
 
 
+async def _run_cli_analyze_and_close(args: argparse.Namespace) -> int:
+    try:
+        return await _run_cli_analyze(args)
+    finally:
+        await llm_client.close()
+
+
 def _build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="codex.graph backend")
     subparsers = parser.add_subparsers(dest="command")
@@ -390,11 +656,16 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     serve_parser = subparsers.add_parser("serve", help="Run HTTP API server")
     serve_parser.add_argument("--host", default="0.0.0.0")
     serve_parser.add_argument("--port", type=int, default=52104)
+    serve_parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Worker processes; in-memory caches and ANALYZE_CONCURRENCY apply per worker",
+    )
 
     analyze_parser = subparsers.add_parser("analyze", help="Run one-shot analysis from CLI")
     analyze_parser.add_argument("--request-json", help="Path to AnalyzeRequest JSON file, or '-' for stdin")
     analyze_parser.add_argument("--code", help="Inline code text")
     analyze_parser.add_argument("--code-file", help="Path to code text file")
+    analyze_parser.add_argument("--source-file", action="append", default=[], help="Source file to analyze (repeatable); all files go in one request")
     analyze_parser.add_argument("--file-path", action="append", default=[], help="Single file path (repeatable)")
     analyze_parser.add_argument("--file-paths", help="Comma-separated file paths")
     analyze_parser.add_argument("--framework-hint", help="Optional framework hint")
@@ -413,16 +684,23 @@ def _main() -> int:
     args = parser.parse_args()
 
     if args.command == "analyze":
-        return asyncio.run(_run_cli_analyze(args))
+        return asyncio.run(_run_cli_analyze_and_close(args))
 
     host = "0.0.0.0"
     port = 52104
+    workers = 1
     if args.command == "serve":
         host = args.host
         port = args.port
+        workers = max(1, args.workers)
 
     import uvicorn
-    uvicorn.run(app, host=host, port=port)
+    # loop/http "auto" pick uvloop and httptools when installed (uvicorn[standard])
+    if workers > 1:
+        # Worker processes import the app themselves, so it must be given as an import string
+        uvicorn.run("main:app", host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app, host=host, port=port)
     return 0
 
 
@@ -8,6 +8,49 @@ from models import (
     WorkflowMetadata
 )
 
+# Regexes are compiled once here; parsing runs on every /analyze response.
+_FENCE_BETWEEN_SECTIONS_RE = re.compile(r'\n```\s*\n+```(?:yaml|mermaid)?\s*\n')
+_FENCE_OPEN_RE = re.compile(r'^```(?:mermaid|yaml)?\s*\n', re.MULTILINE)
+_FENCE_CLOSE_RE = re.compile(r'\n```\s*$')
+_METADATA_SEPARATOR_RE = re.compile(r'\n---\s*\n\s*metadata:')
+_NO_LLM_LINE_RES = (
+    re.compile(r'^NO_LLM_WORKFLOW.*$', re.MULTILINE),
+    re.compile(r'^NO_LLM\s.*$', re.MULTILINE),
+    re.compile(r'^NO_LLM\s*$', re.MULTILINE),
+)
+_YAML_DOC_SEPARATOR_RE = re.compile(r'^---\s*$', re.MULTILINE)
+_NON_ID_CHARS_RE = re.compile(r'[^a-z0-9_]')
+
+# Used by repair_mermaid_response: BOM/zero-width characters, the first diagram line,
+# a "metadata:" header line, a one-line `ID: {...}` metadata entry, and a line that
+# starts with a YAML key
+_INVISIBLE_CHARS_RE = re.compile('[\ufeff\u200b\u200c\u200d\u2060]')
+_DIAGRAM_START_RE = re.compile(r'^(?:flowchart|graph)\b', re.MULTILINE)
+_METADATA_HEADER_RE = re.compile(r'^[ \t]*metadata:[ \t]*$', re.MULTILINE)
+_METADATA_ENTRY_RE = re.compile(r'^[ \t]*[^\s\[\](){}]+:[ \t]*\{.*\}[ \t]*$', re.MULTILINE)
+_YAML_KEY_LINE_RE = re.compile(r'\S+:(?:\s|$)')
+
+# Patterns for node shapes - ORDER MATTERS (more specific first)
+# [label] = step, ([label]) = llm, {label} = decision
+# Node ID pattern: matches path::function or path::function::line format
+# Uses [^\s\[\](){}]+ to match IDs like "main.py::handle", "backend/client.py::call_llm::42"
+_NODE_ID = r'([^\s\[\](){}]+)'
+_NODE_PATTERNS = [
+    (re.compile(_NODE_ID + r'\[\[([^\]]+)\]\]'), 'step'),      # A[[label]] - subroutine
+    (re.compile(_NODE_ID + r'\(\[([^\]]+)\]\)'), 'llm'),       # A([label]) - stadium/llm
+    (re.compile(_NODE_ID + r'\{([^}]+)\}'), 'decision'),       # A{label} - diamond
+    (re.compile(_NODE_ID + r'\[([^\]]+)\]'), 'step'),          # A[label] - rectangle
+    (re.compile(_NODE_ID + r'\(([^)]+)\)'), 'step'),           # A(label) - rounded
+]
+
+# Edge pattern: A --> B, A -->|label| B
+# Node IDs can contain path/function/line separators (. / :: -)
+# Match ID chars including '-', relying on shape suffix or whitespace to delimit
+_EDGE_ID = r'[^\s\[\](){}|>]+'
+_EDGE_RE = re.compile(
+    rf'({_EDGE_ID})(?:\[[^\]]*\]|\(\[[^\]]*\]\)|\{{[^}}]*\}}|\([^)]*\))?\s*-->\s*(?:\|([^|]*)\|)?\s*({_EDGE_ID})'
+)
+
 
 def find_connected_components(node_ids: List[str], edges: List[GraphEdge]) -> List[List[str]]:
     """Find connected components in a subgraph (undirected)."""
@@ -43,6 +86,9 @@ def strip_markdown(text: str) -> str:
     Handles: ```mermaid, ```yaml, ```, and variations.
     """
     text = text.strip()
+    # Every step below needs a fence; most responses arrive already unwrapped
+    if "```" not in text:
+        return text
 
     # Remove leading code block markers
     if text.startswith("```"):
@@ -59,11 +105,11 @@ def strip_markdown(text: str) -> str:
 
     # Handle case where metadata section is wrapped separately
     # e.g., "flowchart...\n```\n\n```yaml\nmetadata:..."
-    text = re.sub(r'\n```\s*\n+```(?:yaml|mermaid)?\s*\n', '\n', text)
+    text = _FENCE_BETWEEN_SECTIONS_RE.sub('\n', text)
 
     # Remove any remaining ``` markers
-    text = re.sub(r'^```(?:mermaid|yaml)?\s*\n', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\n```\s*$', '', text)
+    text = _FENCE_OPEN_RE.sub('', text)
+    text = _FENCE_CLOSE_RE.sub('', text)
 
     return text.strip()
 
@@ -98,7 +144,7 @@ def parse_mermaid_response(response: str) -> WorkflowGraph:
     # Split diagram from metadata
     # Look for "---" followed by "metadata:" (possibly with whitespace)
     # This pattern separates the mermaid diagrams from the YAML metadata
-    metadata_pattern = re.search(r'\n---\s*\n\s*metadata:', response)
+    metadata_pattern = _METADATA_SEPARATOR_RE.search(response)
 
     if metadata_pattern:
         # Found the exact separator pattern
@@ -129,16 +175,15 @@ def parse_mermaid_response(response: str) -> WorkflowGraph:
         metadata_part = metadata_part[9:].strip()
 
     # Remove NO_LLM_WORKFLOW lines that may have been included (with or without filenames)
-    metadata_part = re.sub(r'^NO_LLM_WORKFLOW.*$', '', metadata_part, flags=re.MULTILINE)
-    metadata_part = re.sub(r'^NO_LLM\s.*$', '', metadata_part, flags=re.MULTILINE)
-    metadata_part = re.sub(r'^NO_LLM\s*$', '', metadata_part, flags=re.MULTILINE)
+    for no_llm_re in _NO_LLM_LINE_RES:
+        metadata_part = no_llm_re.sub('', metadata_part)
 
     # Handle multiple --- separators (take only first section)
     if '\n---' in metadata_part:
         metadata_part = metadata_part.split('\n---')[0]
 
     # Remove standalone --- that might cause YAML multi-document issues
-    metadata_part = re.sub(r'^---\s*$', '', metadata_part, flags=re.MULTILINE)
+    metadata_part = _YAML_DOC_SEPARATOR_RE.sub('', metadata_part)
     metadata_part = metadata_part.strip()
 
     try:
@@ -204,6 +249,53 @@ def parse_mermaid_response(response: str) -> WorkflowGraph:
     )
 
 
+def repair_mermaid_response(response: str) -> Optional[str]:
+    """Fix common formatting slips so a response can parse without another LLM call.
+
+    Strips BOM/zero-width characters and prose before the diagram, inserts a
+    missing ``---`` / ``metadata:`` separator, and drops trailing prose after
+    the metadata entries. Everything else is left byte for byte as it was.
+    Returns None if there was nothing to repair.
+    """
+    original = strip_markdown(response)
+    text = _INVISIBLE_CHARS_RE.sub('', original)
+
+    diagram_start = _DIAGRAM_START_RE.search(text)
+    if diagram_start:
+        text = text[diagram_start.start():]
+
+    separator = _METADATA_SEPARATOR_RE.search(text)
+    if separator:
+        head = text[:separator.end()]
+        metadata_part = text[separator.end():]
+    else:
+        header = _METADATA_HEADER_RE.search(text)
+        if header:
+            diagram_part = text[:header.start()]
+            metadata_part = text[header.end():]
+        else:
+            first_entry = _METADATA_ENTRY_RE.search(text)
+            if first_entry is None:
+                return text if text != original else None
+            diagram_part = text[:first_entry.start()]
+            metadata_part = '\n' + text[first_entry.start():]
+        diagram_part = diagram_part.rstrip()
+        if diagram_part.endswith('---'):
+            diagram_part = diagram_part[:-3].rstrip()
+        head = diagram_part + '\n\n---\nmetadata:'
+
+    # Trailing prose is unindented text that doesn't start with a YAML key
+    lines = metadata_part.split('\n')
+    while lines and (
+        not lines[-1].strip()
+        or (not lines[-1][0].isspace() and not _YAML_KEY_LINE_RE.match(lines[-1]))
+    ):
+        lines.pop()
+
+    repaired = head + '\n'.join(lines)
+    return repaired if repaired != original else None
+
+
 def parse_workflows(diagram: str) -> List[Tuple[str, List[str]]]:
     """Split diagram into separate workflow blocks.
 
@@ -248,29 +340,10 @@ def parse_flowchart(lines: List[str], metadata: Dict[str, Any]) -> Tuple[List[Gr
     nodes: Dict[str, GraphNode] = {}
     raw_edges: List[Tuple[str, str, Optional[str]]] = []  # (source, target, label)
 
-    # Patterns for node shapes - ORDER MATTERS (more specific first)
-    # [label] = step, ([label]) = llm, {label} = decision
-    # Node ID pattern: matches path::function or path::function::line format
-    # Uses [^\s\[\](){}]+ to match IDs like "main.py::handle", "backend/client.py::call_llm::42"
-    node_id = r'([^\s\[\](){}]+)'
-    node_patterns = [
-        (node_id + r'\[\[([^\]]+)\]\]', 'step'),      # A[[label]] - subroutine
-        (node_id + r'\(\[([^\]]+)\]\)', 'llm'),       # A([label]) - stadium/llm
-        (node_id + r'\{([^}]+)\}', 'decision'),       # A{label} - diamond
-        (node_id + r'\[([^\]]+)\]', 'step'),          # A[label] - rectangle
-        (node_id + r'\(([^)]+)\)', 'step'),           # A(label) - rounded
-    ]
-
-    # Edge pattern: A --> B, A -->|label| B
-    # Node IDs can contain path/function/line separators (. / :: -)
-    # Match ID chars including '-', relying on shape suffix or whitespace to delimit
-    edge_id = r'[^\s\[\](){}|>]+'
-    edge_pattern = rf'({edge_id})(?:\[[^\]]*\]|\(\[[^\]]*\]\)|\{{[^}}]*\}}|\([^)]*\))?\s*-->\s*(?:\|([^|]*)\|)?\s*({edge_id})'
-
     for line in lines:
         # First pass: Extract node definitions with shapes
-        for pattern, node_type in node_patterns:
-            for match in re.finditer(pattern, line):
+        for pattern, node_type in _NODE_PATTERNS:
+            for match in pattern.finditer(line):
                 node_id = match.group(1)
                 label = match.group(2).strip()
                 # Strip any remaining square/curly brackets from label (but NOT parentheses - used in model names)
@@ -281,7 +354,7 @@ def parse_flowchart(lines: List[str], metadata: Dict[str, Any]) -> Tuple[List[Gr
                     nodes[node_id] = GraphNode(id=node_id, label=label, type=node_type)
 
         # Second pass: Extract edges
-        edge_matches = re.findall(edge_pattern, line)
+        edge_matches = _EDGE_RE.findall(line)
         for match in edge_matches:
             source = match[0]
             label = match[1] if len(match) > 1 and match[1] else None
@@ -346,4 +419,4 @@ def parse_flowchart(lines: List[str], metadata: Dict[str, Any]) -> Tuple[List[Gr
 
 def sanitize_id(name: str) -> str:
     """Convert workflow name to valid ID."""
-    return re.sub(r'[^a-z0-9_]', '_', name.lower()).strip('_')
+    return _NON_ID_CHARS_RE.sub('_', name.lower()).strip('_')
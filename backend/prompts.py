@@ -309,6 +309,25 @@ Output mermaid diagram(s) and metadata section. Each node must have unique sourc
 Return ONLY valid JSON (NOTE: source locations MUST be different for each node)."""
 
 
+# Appended to the parse error when /analyze asks the model to fix its output
+MERMAID_CORRECTION_REMINDER = """CRITICAL FORMAT REMINDER:
+1. Output RAW TEXT only - NO markdown backticks
+2. Mermaid diagram(s) FIRST, then "---" separator, then "metadata:" section
+3. The metadata section must be valid YAML
+
+Example format:
+flowchart TD
+    %% Workflow: Example
+    A[Step] --> B([LLM])
+
+---
+metadata:
+A: {file: "file.py", line: 1, function: "func", type: "step"}
+B: {file: "file.py", line: 10, function: "llm", type: "llm"}
+
+Please re-analyze the code and output in the CORRECT format."""
+
+
 # Metadata-only prompt for incremental updates
 # Much smaller and faster than full analysis
 METADATA_ONLY_PROMPT = """Generate human-readable labels and descriptions for code functions.
@@ -0,0 +1,48 @@
+"""Shared fixtures for tests that drive LLMClient against a fake LiteLLM gateway."""
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import gemini_client
+
+LITELLM_CONFIG = ("", "http://gateway.test/v1", "sk-test", "test-model", False, "", False)
+
+COMPLETION = {
+    "choices": [{"message": {"role": "assistant", "content": "graph TD\n  A --> B"}}],
+    "usage": {"prompt_tokens": 11, "completion_tokens": 7, "total_tokens": 18},
+}
+
+
+def sse_body(*chunks: dict) -> bytes:
+    return b"".join(b"data: " + json.dumps(chunk).encode() + b"\n\n" for chunk in chunks) + b"data: [DONE]\n\n"
+
+
+class LiteLLMTestCase(unittest.IsolatedAsyncioTestCase):
+    """An LLMClient configured for LiteLLM whose requests go to self.respond(payload)."""
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.http = httpx.AsyncClient(transport=httpx.MockTransport(self._handle))
+        patch = mock.patch.object(gemini_client, "get_http", lambda verify: self.http)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addAsyncCleanup(self.http.aclose)
+        self.client = gemini_client.LLMClient()
+        self.client._apply_config(LITELLM_CONFIG)
+        self.client._refresh_from_env_if_needed = lambda: None
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.requests.append(payload)
+        response = self.respond(payload)
+        return await response if asyncio.iscoroutine(response) else response
+
+    async def _analyze(self):
+        return await self.client.analyze_workflow("def f(): pass")
@@ -0,0 +1,76 @@
+"""The /analyze generation cap, created per server lifespan from ANALYZE_CONCURRENCY.
+
+Run from backend/: python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from config import Settings
+from gemini_client import LLMStream
+
+
+def forget_semaphore() -> None:
+    if hasattr(main.app.state, "analyze_semaphore"):
+        del main.app.state.analyze_semaphore
+
+
+class AnalyzeSemaphoreLifespanTest(unittest.TestCase):
+    def tearDown(self):
+        forget_semaphore()
+
+    def test_each_lifespan_creates_a_semaphore_sized_from_settings(self):
+        settings = Settings(_env_file=None, analyze_concurrency=3)
+        semaphores = []
+        with mock.patch.object(main, "get_settings", return_value=settings):
+            for _ in range(2):
+                with TestClient(main.app):
+                    semaphores.append(main.app.state.analyze_semaphore)
+        self.assertEqual([semaphore._value for semaphore in semaphores], [3, 3])
+        self.assertIsNot(semaphores[0], semaphores[1])  # each belongs to its own event loop
+
+    def test_concurrency_below_one_still_allows_one_generation(self):
+        with mock.patch.object(main, "get_settings", return_value=Settings(_env_file=None, analyze_concurrency=0)):
+            with TestClient(main.app):
+                self.assertEqual(main.app.state.analyze_semaphore._value, 1)
+
+
+class AnalyzeSemaphoreTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.running = 0
+        self.peak = 0
+        patch = mock.patch.object(main.llm_client, "analyze_workflow_stream", self._stream)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(forget_semaphore)
+
+    def _stream(self, *args, **kwargs) -> LLMStream:
+        async def produce(stream):
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await asyncio.sleep(0.01)
+            self.running -= 1
+            yield "graph TD"
+
+        return LLMStream(produce)
+
+    async def test_generations_wait_for_a_free_slot(self):
+        main.app.state.analyze_semaphore = asyncio.Semaphore(2)
+        results = await asyncio.gather(*[main._collect_analysis(None, "code") for _ in range(6)])
+        self.assertEqual([text for text, _, _ in results], ["graph TD"] * 6)
+        self.assertEqual(self.peak, 2)
+
+    async def test_no_cap_without_a_lifespan(self):
+        await asyncio.gather(*[main._collect_analysis(None, "code") for _ in range(6)])
+        self.assertEqual(self.peak, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
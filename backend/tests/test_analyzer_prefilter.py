@@ -0,0 +1,118 @@
+"""The analyzer's literal prefilter never changes a detection result.
+
+Run from backend/: python -m unittest discover tests
+"""
+import importlib.util
+import os
+import re
+import sys
+import sysconfig
+import unittest
+from pathlib import Path
+from unittest import mock
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+import analyzer
+from analyzer import StaticAnalyzer, _PatternGroup
+
+# Rewrites for the regex constructs the detection patterns use, in order
+_EXAMPLE_REWRITES = [
+    (r"\s+", " "), (r"\s*", ""), (r".*", " x "), (r"\w+", "app"), (r"\b", ""),
+    (r"['\"]", '"'), (r'[<"]', "<"), (r'[>"]', ">"), (r"[Ss]", "S"),
+    (r"\(", "("), (r"\.", "."), (r"\/", "/"),
+]
+
+
+def pattern_examples(pattern: str) -> list[str]:
+    """One matching string per top-level branch of a detection pattern."""
+    examples = []
+    for branch in pattern.split("|"):
+        for construct, text in _EXAMPLE_REWRITES:
+            branch = branch.replace(construct, text)
+        examples.append(branch)
+    return examples
+
+
+def all_patterns() -> list[str]:
+    groups = StaticAnalyzer._ALL_GROUPS
+    return [pattern for group in groups for pattern in group.patterns]
+
+
+def corpus() -> list[str]:
+    """Positive examples in and out of context, near misses, and real source files."""
+    texts = []
+    for pattern in all_patterns():
+        for example in pattern_examples(pattern):
+            assert re.search(pattern, example), (pattern, example)
+            texts.append(example)
+            texts.append(f"def handler():\n    client = {example}\n    return client\n")
+            # Break the example in the middle so near misses are covered too
+            texts.append(example[: len(example) // 2] + "\n" + example[len(example) // 2:])
+    stdlib = Path(sysconfig.get_paths()["stdlib"])
+    texts.extend(
+        path.read_text(encoding="utf-8", errors="replace")
+        for path in sorted(stdlib.glob("*.py"))[:150]
+    )
+    texts.extend(Path(BACKEND, name).read_text(encoding="utf-8") for name in ("main.py", "gemini_client.py"))
+    return texts
+
+
+class PrefilterEquivalenceTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.texts = corpus()
+
+    def test_every_group_matches_exactly_as_its_unfiltered_regex(self):
+        for group in StaticAnalyzer._ALL_GROUPS:
+            self.assertIsNotNone(group.anchors)  # this interpreter supports the prefilter
+            for text in self.texts:
+                if group.matches(text) != bool(group.regex.search(text)):
+                    self.fail(f"prefilter changed the result of {group.patterns[0]!r} on {text[:80]!r}")
+
+    def test_global_anchor_check_never_rejects_a_match(self):
+        for text in self.texts:
+            if not StaticAnalyzer.has_anchor(text):
+                for group in StaticAnalyzer._ALL_GROUPS:
+                    self.assertIsNone(group.regex.search(text), text[:80])
+
+    def test_detection_matches_the_unfiltered_analyzer(self):
+        def detect(code):
+            return StaticAnalyzer._detect_workflow(code), StaticAnalyzer._detect_framework(code)
+
+        with mock.patch.object(StaticAnalyzer, "ANCHORS", None), \
+                mock.patch.object(StaticAnalyzer, "_NATIVE_MATCHER", None), \
+                mock.patch.object(_PatternGroup, "matches", lambda group, code: group.regex.search(code) is not None):
+            expected = [detect(text) for text in self.texts]
+        with mock.patch.object(StaticAnalyzer, "_NATIVE_MATCHER", None):
+            actual = [detect(text) for text in self.texts]
+        self.assertEqual(actual, expected)
+
+    def test_parser_errors_disable_the_prefilter_for_that_pattern(self):
+        # Only the analyzer's reference: re itself keeps its working parser
+        broken_parser = mock.Mock(parse=mock.Mock(side_effect=TypeError("changed internals")))
+        with mock.patch.object(analyzer, "_parser", broken_parser):
+            group = _PatternGroup([r"from\s+openai\s+import"])
+        self.assertIsNone(group.anchors)
+        self.assertTrue(group.matches("from openai import OpenAI"))
+        self.assertFalse(group.matches("import os"))
+
+    def test_analyzer_imports_without_the_private_parser(self):
+        spec = importlib.util.spec_from_file_location("analyzer_without_parser", os.path.join(BACKEND, "analyzer.py"))
+        module = importlib.util.module_from_spec(spec)
+        parser = sys.modules["re._parser"]
+        try:
+            del re._parser
+            with mock.patch.dict(sys.modules, {"re._parser": None}):
+                spec.loader.exec_module(module)
+        finally:
+            re._parser = parser
+        self.assertIsNone(module.StaticAnalyzer.ANCHORS)
+        self.assertIsNone(module.StaticAnalyzer.LLM_CLIENTS.anchors)
+        code = "from openai import OpenAI\nclient.chat.completions.create(model='gpt')\n"
+        self.assertTrue(module.StaticAnalyzer._workflow_from(lambda group: group.matches(code)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""BodySizeLimitMiddleware: 413 for declared and streamed bodies over the cap.
+
+Run from backend/: python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from main import BodySizeLimitMiddleware
+
+LIMIT = 100
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, path="/analyze", max_bytes=LIMIT)
+
+    @app.post("/analyze")
+    async def analyze(request: Request):
+        return {"received": len(await request.body())}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"received": len(await request.body())}
+
+    return app
+
+
+class BodySizeLimitTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(build_app())
+
+    def test_body_at_the_limit_passes_through(self):
+        response = self.client.post("/analyze", content=b"x" * LIMIT)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"received": LIMIT})
+
+    def test_oversized_declared_body_is_rejected(self):
+        response = self.client.post("/analyze", content=b"x" * (LIMIT + 1))
+        self.assertEqual(response.status_code, 413)
+        self.assertIn(f"({LIMIT} bytes)", response.json()["detail"])
+
+    def test_chunked_body_under_the_limit_passes_through(self):
+        response = self.client.post("/analyze", content=iter([b"x" * 40, b"x" * 40]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"received": 80})
+
+    def test_oversized_chunked_body_is_rejected(self):
+        response = self.client.post("/analyze", content=iter([b"x" * 60, b"x" * 60]))
+        self.assertEqual(response.status_code, 413)
+
+    def test_other_paths_are_not_limited(self):
+        response = self.client.post("/other", content=b"x" * (LIMIT * 3))
+        self.assertEqual(response.json(), {"received": LIMIT * 3})
+
+
+class StreamedBodyTest(unittest.IsolatedAsyncioTestCase):
+    """Drives the ASGI app directly, so the body really arrives as separate messages."""
+
+    async def post_chunks(self, chunks: list[bytes]) -> tuple[list[dict], int]:
+        messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+        messages.append({"type": "http.request", "body": b"", "more_body": False})
+        read = 0
+        sent = []
+
+        async def receive():
+            nonlocal read
+            if read < len(messages):
+                read += 1
+                return messages[read - 1]
+            await asyncio.sleep(3600)  # a real client would be waiting for the response
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": "/analyze", "raw_path": b"/analyze", "root_path": "",
+            "query_string": b"", "headers": [(b"transfer-encoding", b"chunked")],
+            "client": ("test", 1), "server": ("test", 80),
+        }
+        await asyncio.wait_for(build_app()(scope, receive, send), 5)
+        return sent, read
+
+    async def test_oversized_stream_gets_one_413_and_stops_being_read(self):
+        sent, read = await self.post_chunks([b"x" * 30] * 10)
+        starts = [message for message in sent if message["type"] == "http.response.start"]
+        self.assertEqual([message["status"] for message in starts], [413])
+        self.assertEqual(read, 4)  # the fourth chunk crossed the limit; the rest were never read
+
+    async def test_stream_under_the_limit_reaches_the_app(self):
+        sent, _ = await self.post_chunks([b"x" * 30, b"x" * 30, b"x" * 40])
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(b"".join(m.get("body", b"") for m in sent[1:]), b'{"received":100}')
+
+
+if __name__ == "__main__":
+    unittest.main()
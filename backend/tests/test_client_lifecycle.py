@@ -0,0 +1,53 @@
+"""LLMClient.close() on shutdown, and reuse of the same client afterwards.
+
+Run from backend/: python -m unittest discover tests
+"""
+import unittest
+from unittest import mock
+
+import httpx
+
+import gemini_client
+from litellm_fakes import COMPLETION, LITELLM_CONFIG, LiteLLMTestCase
+
+GEMINI_CONFIG = ("test-key", "", "", "", True, "", False)
+
+
+class ClientLifecycleTest(LiteLLMTestCase):
+    def respond(self, payload):
+        return httpx.Response(200, json=COMPLETION)
+
+    async def test_litellm_calls_work_after_close(self):
+        await self.client.generate_metadata("before")
+        await self.client.close()
+        text, usage, _ = await self.client.generate_metadata("after")
+        self.assertEqual(text, COMPLETION["choices"][0]["message"]["content"])
+        self.assertEqual(usage.total_tokens, 18)
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_close_drops_the_gemini_client_and_refresh_rebuilds_it(self):
+        client = gemini_client.LLMClient()
+        client._apply_config(GEMINI_CONFIG)
+        closed = client.gemini_client
+        self.assertIsNotNone(closed)
+
+        await client.close()
+        self.assertIsNone(client.gemini_client)
+        self.assertTrue(client.configured)  # a closed client still reports its provider
+
+        settings = gemini_client.Settings(_env_file=None, gemini_api_key="test-key")
+        with mock.patch.object(gemini_client, "get_settings", mock.Mock(return_value=settings)):
+            client._refresh_from_env_if_needed()
+        self.assertIsNotNone(client.gemini_client)
+        self.assertIsNot(client.gemini_client, closed)
+
+    async def test_unconfigured_client(self):
+        client = gemini_client.LLMClient()
+        client._apply_config(("", "", "", "", True, "", False))
+        self.assertFalse(client.configured)
+        client._apply_config(LITELLM_CONFIG)
+        self.assertTrue(client.configured)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""DiskCache expiry, pruning and recovery from unreadable files.
+
+Run from backend/: python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_cache import DiskCache
+
+
+def key(n: int) -> str:
+    return f"{n:064x}"
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.now = time.time()
+
+    def cache(self, **kwargs) -> DiskCache:
+        return DiskCache(self.directory, clock=lambda: self.now, **kwargs)
+
+    def put(self, cache: DiskCache, n: int, age: float) -> None:
+        """Store entry n as if it had been written age seconds ago."""
+        cache.set(key(n), f"text {n}")
+        mtime = self.now - age
+        os.utime(cache._path(key(n)), (mtime, mtime))
+
+    def stored(self, cache: DiskCache) -> set[str]:
+        return {path.stem for path in cache._entry_files()}
+
+    def test_round_trip_and_miss(self):
+        cache = self.cache()
+        cache.set(key(1), "graph TD\n  A --> B é")
+        self.assertEqual(cache.get(key(1)), "graph TD\n  A --> B é")
+        self.assertIsNone(cache.get(key(2)))
+
+    def test_expired_entry_is_a_miss_and_is_deleted(self):
+        cache = self.cache(ttl=100)
+        self.put(cache, 1, age=10)
+        self.assertEqual(cache.get(key(1)), "text 1")
+
+        self.now += 90
+        self.assertIsNone(cache.get(key(1)))
+        self.assertFalse(cache._path(key(1)).exists())
+
+    def test_writes_past_the_cap_prune_the_oldest_to_ninety_percent(self):
+        cache = self.cache(max_entries=10)
+        for n in range(10):
+            self.put(cache, n, age=100 - n)
+        self.assertEqual(len(self.stored(cache)), 10)
+
+        cache.set(key(10), "text 10")  # real mtime: the newest entry
+        self.assertEqual(self.stored(cache), {key(n) for n in range(2, 11)})
+
+    def test_pruning_drops_expired_entries_first(self):
+        cache = self.cache(max_entries=10, ttl=1000)
+        for n in range(5):
+            self.put(cache, n, age=5000 + n)
+        for n in range(5, 10):
+            self.put(cache, n, age=10 - n)
+        self.assertEqual(len(self.stored(cache)), 10)
+
+        cache.set(key(10), "text 10")
+        self.assertEqual(self.stored(cache), {key(n) for n in range(5, 11)})
+
+    def test_files_from_an_earlier_process_count_toward_the_cap(self):
+        earlier = self.cache(max_entries=100)
+        for n in range(12):
+            self.put(earlier, n, age=100 - n)
+
+        cache = self.cache(max_entries=10)
+        cache.set(key(12), "text 12")
+        self.assertEqual(self.stored(cache), {key(n) for n in range(4, 13)})
+
+    def test_rewriting_an_entry_does_not_count_twice(self):
+        cache = self.cache(max_entries=3)
+        for n in range(3):
+            cache.set(key(n), "first")
+        for _ in range(5):
+            cache.set(key(0), "again")
+        self.assertEqual(len(self.stored(cache)), 3)
+        self.assertEqual(cache.get(key(0)), "again")
+
+    def test_undecodable_file_is_a_miss_and_is_replaced(self):
+        cache = self.cache()
+        path = cache._path(key(1))
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"\xff\xfe not utf-8")
+
+        self.assertIsNone(cache.get(key(1)))
+        self.assertFalse(path.exists())
+        cache.set(key(1), "fresh")
+        self.assertEqual(cache.get(key(1)), "fresh")
+
+    def test_unreadable_entry_is_a_miss(self):
+        cache = self.cache()
+        cache._path(key(1)).mkdir(parents=True)  # a directory where the file should be
+        self.assertIsNone(cache.get(key(1)))
+        cache.set(key(1), "text")  # the failed write is swallowed too
+        self.assertIsNone(cache.get(key(1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""LiteLLM /analyze streaming: gateways with partial streaming support, and hedged starts.
+
+Run from backend/: python -m unittest discover tests
+"""
+import asyncio
+import unittest
+
+import httpx
+
+from litellm_fakes import COMPLETION, LiteLLMTestCase, sse_body
+
+
+class LiteLLMStreamFallbackTest(LiteLLMTestCase):
+    async def test_event_stream(self):
+        self.respond = lambda payload: httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=sse_body(
+                {"choices": [{"delta": {"content": "graph TD\n"}}]},
+                {"choices": [{"delta": {"content": "  A --> B"}}]},
+                {"choices": [], "usage": COMPLETION["usage"]},
+            ),
+        )
+        text, usage, _ = await self._analyze()
+        self.assertEqual(text, "graph TD\n  A --> B")
+        self.assertEqual(usage.total_tokens, 18)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0]["stream_options"], {"include_usage": True})
+
+    async def test_gateway_ignoring_stream_returns_json_body(self):
+        self.respond = lambda payload: httpx.Response(200, json=COMPLETION)
+        text, usage, _ = await self._analyze()
+        self.assertEqual(text, "graph TD\n  A --> B")
+        self.assertEqual((usage.input_tokens, usage.output_tokens), (11, 7))
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_gateway_rejecting_stream_options_is_retried_without_them(self):
+        def respond(payload):
+            if "stream_options" in payload:
+                return httpx.Response(400, json={"error": {"message": "Unrecognized request argument: stream_options"}})
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream; charset=utf-8"},
+                content=sse_body({"choices": [{"delta": {"content": "graph TD\n  A --> B"}}]}),
+            )
+
+        self.respond = respond
+        text, _, _ = await self._analyze()
+        self.assertEqual(text, "graph TD\n  A --> B")
+        self.assertEqual([("stream_options" in p, p.get("stream")) for p in self.requests], [(True, True), (False, True)])
+
+    async def test_gateway_rejecting_stream_falls_back_to_a_plain_completion(self):
+        def respond(payload):
+            if payload.get("stream"):
+                return httpx.Response(422, json={"detail": "stream is not supported"})
+            return httpx.Response(200, json=COMPLETION)
+
+        self.respond = respond
+        text, usage, _ = await self._analyze()
+        self.assertEqual(text, "graph TD\n  A --> B")
+        self.assertEqual(usage.total_tokens, 18)
+        self.assertEqual([p.get("stream") for p in self.requests], [True, None])
+
+    async def test_unrelated_bad_request_is_not_retried(self):
+        self.respond = lambda payload: httpx.Response(400, json={"error": {"message": "model not found"}})
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self._analyze()
+        self.assertEqual(len(self.requests), 1)
+
+
+class HedgedStreamAccountingTest(LiteLLMTestCase):
+    async def test_abandoned_duplicate_prompt_is_billed(self):
+        async def respond(payload):
+            if len(self.requests) == 1:
+                await asyncio.sleep(5)  # the first request stalls and loses the hedge
+            return httpx.Response(200, json=COMPLETION)
+
+        self.respond = respond
+        self.client.hedge_after = 0.05
+        text, usage, _ = await self._analyze()
+        self.assertEqual(text, "graph TD\n  A --> B")
+        self.assertEqual(len(self.requests), 2)
+        # The winner's usage plus the cancelled duplicate's prompt
+        self.assertEqual((usage.input_tokens, usage.output_tokens, usage.total_tokens), (22, 7, 29))
+        self.assertEqual(self.client.hedge_stats(), {"fired": 1, "won": 1})
+
+    async def test_unhedged_stream_reports_its_own_usage(self):
+        self.respond = lambda payload: httpx.Response(200, json=COMPLETION)
+        self.client.hedge_after = 0.5
+        _, usage, _ = await self._analyze()
+        self.assertEqual(usage.input_tokens, 11)
+        self.assertEqual(self.client.hedge_stats(), {"fired": 0, "won": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
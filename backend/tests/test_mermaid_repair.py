@@ -0,0 +1,95 @@
+"""repair_mermaid_response: the local fix tried before a paid correction retry.
+
+Run from backend/: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mermaid_parser import parse_mermaid_response, repair_mermaid_response
+
+DIAGRAM = """flowchart TD
+    %% Workflow: Summarize
+    main.py::handle[Handle request] --> client.py::call_llm([Call Gemini])
+    client.py::call_llm --> main.py::respond{Valid?}"""
+
+ENTRIES = """main.py::handle: {file: "main.py", line: 10, function: "handle", type: "step"}
+client.py::call_llm: {file: "client.py", line: 42, function: "call_llm", type: "llm", model: "gemini-2.5-flash"}
+main.py::respond: {file: "main.py", line: 20, function: "respond", type: "decision"}"""
+
+VALID = f"{DIAGRAM}\n\n---\nmetadata:\n{ENTRIES}"
+
+# Responses that already parse; repair must leave them alone
+ALREADY_VALID = [
+    ("canonical", VALID),
+    ("separator spacing", f"{DIAGRAM}\n---\n\nmetadata:\n\n{ENTRIES}"),
+    ("fenced", f"```mermaid\n{VALID}\n```"),
+    ("separately fenced sections", f"```mermaid\n{DIAGRAM}\n```\n\n```yaml\n---\nmetadata:\n{ENTRIES}\n```"),
+    ("block style metadata", f"{DIAGRAM}\n\n---\nmetadata:\nmain.py::handle:\n  file: main.py\n  line: 10"),
+    ("no workflow", "NO_LLM_WORKFLOW"),
+]
+
+# (name, response, exact repair)
+REPAIRS = [
+    ("missing separator", f"{DIAGRAM}\n\n{ENTRIES}", VALID),
+    ("metadata header without ---", f"{DIAGRAM}\n\nmetadata:\n{ENTRIES}", VALID),
+    ("--- without metadata header", f"{DIAGRAM}\n---\n{ENTRIES}", VALID),
+    ("byte order mark", f"﻿{VALID}", VALID),
+    ("zero-width space in an id", VALID.replace("main.py::handle[", "main.py::​handle["), VALID),
+    ("prose before the diagram", f"Here is the analysis (2 workflows):\n\n{VALID}", VALID),
+    ("trailing prose", f"{VALID}\n\nLet me know if you need anything else!", VALID),
+    ("unclosed opening fence", f"```mermaid\n{DIAGRAM}\n\n{ENTRIES}", VALID),
+    ("closing fence only", f"{DIAGRAM}\n\nmetadata:\n{ENTRIES}\n```", VALID),
+    ("fence between the sections", f"{DIAGRAM}\n```\nmetadata:\n{ENTRIES}", VALID),
+    ("fence then prose at the end", f"{VALID}\n```\nHope this helps.", VALID),
+    (
+        "everything at once",
+        f"﻿Sure! Here it is:\n```mermaid\n{DIAGRAM}\n```\n\n{ENTRIES}\n\nThese are all the nodes.",
+        VALID,
+    ),
+]
+
+# Nothing recognizable to repair
+UNREPAIRABLE = [
+    ("prose only", "I could not find any LLM calls in this code."),
+    ("diagram without metadata", DIAGRAM),
+]
+
+
+def graph_summary(response: str):
+    graph = parse_mermaid_response(response)
+    return (
+        sorted((n.id, n.label, n.type, n.model, n.source.line if n.source else None) for n in graph.nodes),
+        sorted((e.source, e.target, e.label) for e in graph.edges),
+    )
+
+
+class RepairMermaidResponseTest(unittest.TestCase):
+    def test_valid_responses_are_left_unchanged(self):
+        for name, response in ALREADY_VALID:
+            with self.subTest(name):
+                parse_mermaid_response(response)  # the premise: it already parses
+                self.assertIsNone(repair_mermaid_response(response))
+
+    def test_repairs(self):
+        for name, response, expected in REPAIRS:
+            with self.subTest(name):
+                repaired = repair_mermaid_response(response)
+                self.assertEqual(repaired, expected)
+                self.assertEqual(graph_summary(repaired), graph_summary(VALID))
+
+    def test_repair_is_idempotent(self):
+        for name, response, _ in REPAIRS:
+            with self.subTest(name):
+                self.assertIsNone(repair_mermaid_response(repair_mermaid_response(response)))
+
+    def test_unrepairable_responses(self):
+        for name, response in UNREPAIRABLE:
+            with self.subTest(name):
+                self.assertIsNone(repair_mermaid_response(response))
+
+
+if __name__ == "__main__":
+    unittest.main()
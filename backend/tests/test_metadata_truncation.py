@@ -0,0 +1,95 @@
+"""/analyze/metadata-only on LLM responses cut off at every possible point.
+
+Run from backend/: python -m unittest discover tests
+"""
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from models import CostData, TokenUsage
+
+FULL_RESPONSE = json.dumps({
+    "files": [
+        {
+            "filePath": "src/a{b}[c].py",
+            "functions": [
+                {"name": "load", "label": "He said \"hi\" \\ {x}", "description": "Loads [data]"},
+                {"name": "score", "label": "Score", "description": "Rates 12.5e3 items"},
+            ],
+            "edgeLabels": {"load→score": "feeds"},
+        },
+        {
+            "filePath": "src/b.py",
+            "functions": [{"name": "run", "label": "Run", "description": "Entry point"}],
+            "edgeLabels": {},
+        },
+    ]
+}, ensure_ascii=False, indent=1)
+
+USAGE = TokenUsage(input_tokens=1, output_tokens=1, total_tokens=2)
+COST = CostData(input_cost=0.0, output_cost=0.0, total_cost=0.0)
+REQUEST = {"files": [{"filePath": "src/b.py", "functions": [], "imports": []}]}
+
+
+class TruncatedMetadataResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(main.app)
+        patches = [
+            mock.patch.object(main.llm_client, "provider", "litellm"),
+            mock.patch.object(main.llm_client, "generate_metadata", self._generate_metadata),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.response_text = FULL_RESPONSE
+
+    async def _generate_metadata(self, prompt):
+        return self.response_text, USAGE, COST
+
+    def test_every_prefix_returns_a_subset_of_the_full_result(self):
+        self.response_text = FULL_RESPONSE
+        full = self.client.post("/analyze/metadata-only", json=REQUEST).json()["files"]
+        full_functions = {(file["filePath"], json.dumps(fn, sort_keys=True))
+                          for file in full for fn in file["functions"]}
+
+        opened = FULL_RESPONSE.index("[") + 1  # past '{"files": ['
+        for cut in range(opened, len(FULL_RESPONSE) + 1):
+            with self.subTest(tail=FULL_RESPONSE[max(0, cut - 20):cut]):
+                self.response_text = FULL_RESPONSE[:cut]
+                response = self.client.post("/analyze/metadata-only", json=REQUEST)
+                self.assertEqual(response.status_code, 200, response.text)
+                for file in response.json()["files"]:
+                    self.assertIsInstance(file["filePath"], str)
+                    for fn in file["functions"]:
+                        # Only complete members survive, never a null or a cut-off string
+                        if fn["name"] and fn["label"] and fn["description"]:
+                            self.assertIn((file["filePath"], json.dumps(fn, sort_keys=True)), full_functions)
+                        for value in fn.values():
+                            self.assertIsInstance(value, str)
+                    for label in file["edgeLabels"].values():
+                        self.assertEqual(label, "feeds")
+
+    def test_explicit_nulls_fall_back_to_defaults(self):
+        self.response_text = json.dumps({"files": [{
+            "filePath": "a.py",
+            "functions": [{"name": "f", "label": None, "description": None}],
+            "edgeLabels": None,
+        }]})
+        response = self.client.post("/analyze/metadata-only", json=REQUEST)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["files"], [{
+            "filePath": "a.py",
+            "functions": [{"name": "f", "label": "f", "description": ""}],
+            "edgeLabels": {},
+        }])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Single-flight coalescing of identical concurrent LLM requests.
+
+Run from backend/: python -m unittest discover tests
+"""
+import asyncio
+import unittest
+
+import httpx
+
+from litellm_fakes import COMPLETION, LiteLLMTestCase, sse_body
+
+
+class SingleFlightTest(LiteLLMTestCase):
+    async def _slow_completion(self, payload):
+        await asyncio.sleep(0.05)  # long enough for every caller to join
+        return httpx.Response(200, json=COMPLETION)
+
+    async def test_identical_calls_share_one_upstream_request(self):
+        self.respond = self._slow_completion
+        results = await asyncio.gather(*[self.client.generate_metadata("same prompt") for _ in range(8)])
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual({text for text, _, _ in results}, {COMPLETION["choices"][0]["message"]["content"]})
+        # Only the caller that made the request reports its tokens
+        self.assertEqual(sorted(usage.total_tokens for _, usage, _ in results), [0] * 7 + [18])
+        stats = self.client.cache.stats()
+        self.assertEqual((stats["misses"], stats["coalesced"]), (1, 7))
+        self.assertEqual(self.client._inflight, {})
+
+    async def test_identical_streams_share_one_upstream_request(self):
+        async def respond(payload):
+            await asyncio.sleep(0.05)
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=sse_body({"choices": [{"delta": {"content": "graph TD\n  A --> B"}}]}),
+            )
+
+        self.respond = respond
+        results = await asyncio.gather(*[self._analyze() for _ in range(4)])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual({text for text, _, _ in results}, {"graph TD\n  A --> B"})
+        self.assertEqual(self.client._inflight, {})
+
+    async def test_different_prompts_are_not_coalesced(self):
+        self.respond = self._slow_completion
+        await asyncio.gather(self.client.generate_metadata("one"), self.client.generate_metadata("two"))
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_owner_failure_reaches_every_waiter(self):
+        async def respond(payload):
+            await asyncio.sleep(0.05)
+            return httpx.Response(400, json={"error": {"message": "bad model"}})
+
+        self.respond = respond
+        results = await asyncio.gather(
+            *[self.client.generate_metadata("same prompt") for _ in range(5)], return_exceptions=True
+        )
+        self.assertEqual(len(self.requests), 1)
+        for result in results:
+            self.assertIsInstance(result, httpx.HTTPStatusError)
+        self.assertEqual(self.client._inflight, {})
+        self.assertEqual(self.client.cache.stats()["entries"], 0)
+
+    async def test_cancelled_owner_hands_the_request_to_a_waiter(self):
+        async def respond(payload):
+            if len(self.requests) == 1:
+                await asyncio.sleep(5)  # the owner's request; it is cancelled first
+            return httpx.Response(200, json=COMPLETION)
+
+        self.respond = respond
+        owner = asyncio.create_task(self.client.generate_metadata("same prompt"))
+        while not self.requests:
+            await asyncio.sleep(0.001)
+        waiter = asyncio.create_task(self.client.generate_metadata("same prompt"))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+
+        text, usage, _ = await waiter
+        self.assertEqual(text, COMPLETION["choices"][0]["message"]["content"])
+        self.assertEqual(usage.total_tokens, 18)  # the waiter paid for its own request
+        self.assertTrue(owner.cancelled())
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.client._inflight, {})
+
+
+if __name__ == "__main__":
+    unittest.main()